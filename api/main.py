@@ -3,10 +3,13 @@ FinBundle FastAPI Backend
 RESTful API for the React frontend
 """
 import os
+import queue
 import asyncio
 import base64
+import logging
+import logging.handlers
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from contextlib import asynccontextmanager
 
@@ -99,19 +102,44 @@ class BehavioralSignal(BaseModel):
 
 # --- App Setup ---
 
+def _start_log_listener() -> Tuple[logging.handlers.QueueListener, logging.Handler]:
+    """
+    Route log records through a queue so request handlers never block on stderr.
+    
+    Returns the listener and the root-logger handler feeding it; pass both
+    to _stop_log_listener() on shutdown.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    logging.getLogger().addHandler(handler)
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    return listener, handler
+
+
+def _stop_log_listener(listener: logging.handlers.QueueListener, handler: logging.Handler):
+    """Detach the queue handler and drain the listener."""
+    logging.getLogger().removeHandler(handler)
+    listener.stop()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting FinBundle API...")
-    app.state.engine = FinBundleEngine()
-    app.state.metrics = get_metrics_logger()
-    app.state.request_count = 0
-    app.state.total_latency_ms = 0
-    print("✅ Engine initialized")
-    yield
-    # Shutdown
-    print("👋 Shutting down...")
-    app.state.metrics.close()
+    log_listener, log_handler = _start_log_listener()
+    try:
+        app.state.engine = FinBundleEngine()
+        app.state.metrics = get_metrics_logger()
+        app.state.request_count = 0
+        app.state.total_latency_ms = 0
+        print("✅ Engine initialized")
+        yield
+        # Shutdown
+        print("👋 Shutting down...")
+        app.state.metrics.close()
+    finally:
+        _stop_log_listener(log_listener, log_handler)
 
 
 app = FastAPI(
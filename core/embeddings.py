@@ -3,13 +3,77 @@ Embedding Service
 Wraps sentence-transformers for query and batch encoding
 """
 import numpy as np
+from pathlib import Path
 from typing import List, Union
 from functools import lru_cache
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # Lazy load to avoid import time
 _model = None
 
 
+def _l2_normalize_numpy(x: np.ndarray) -> np.ndarray:
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+
+def _mean_pool_numpy(hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    m = mask[..., None].astype(hidden.dtype)
+    return (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _l2_normalize_numba(x):
+        n, d = x.shape
+        out = np.empty_like(x)
+        for i in prange(n):
+            s = 0.0
+            for j in range(d):
+                s += x[i, j] * x[i, j]
+            inv = 1.0 / max(np.sqrt(s), 1e-12)
+            for j in range(d):
+                out[i, j] = x[i, j] * inv
+        return out
+    
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _mean_pool_numba(hidden, mask):
+        n, t, d = hidden.shape
+        out = np.zeros((n, d), dtype=hidden.dtype)
+        for i in prange(n):
+            count = 0.0
+            for k in range(t):
+                if mask[i, k]:
+                    count += 1.0
+                    for j in range(d):
+                        out[i, j] += hidden[i, k, j]
+            inv = 1.0 / max(count, 1e-9)
+            for j in range(d):
+                out[i, j] *= inv
+        return out
+
+
+def l2_normalize(x: np.ndarray) -> np.ndarray:
+    """Row-wise L2 normalization (multi-threaded with Numba when available)."""
+    if NUMBA_AVAILABLE:
+        return _l2_normalize_numba(np.ascontiguousarray(x, dtype=np.float32))
+    return _l2_normalize_numpy(x)
+
+
+def mean_pool(hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings over non-padding positions."""
+    if NUMBA_AVAILABLE:
+        return _mean_pool_numba(
+            np.ascontiguousarray(hidden, dtype=np.float32),
+            np.ascontiguousarray(mask)
+        )
+    return _mean_pool_numpy(hidden, mask)
+
+
 def _get_model():
     """Lazy load the embedding model."""
     global _model
@@ -47,9 +111,10 @@ class EmbeddingService:
             text: Query string
             
         Returns:
-            numpy array of shape (384,)
+            numpy array of shape (384,), L2-normalized
         """
-        return self.model.encode(text, convert_to_numpy=True)
+        # Unit length so dot-product collections score it like cosine
+        return self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
     
     def encode_batch(self, texts: List[str], batch_size: int = 32,
                      show_progress: bool = False) -> np.ndarray:
@@ -62,13 +127,14 @@ class EmbeddingService:
             show_progress: Show progress bar
             
         Returns:
-            numpy array of shape (len(texts), 384)
+            numpy array of shape (len(texts), 384), L2-normalized
         """
         return self.model.encode(
             texts,
             batch_size=batch_size,
             show_progress_bar=show_progress,
-            convert_to_numpy=True
+            convert_to_numpy=True,
+            normalize_embeddings=True
         )
     
     def similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
@@ -87,6 +153,89 @@ class EmbeddingService:
         return 384
 
 
+# Default location of the exported + INT8-quantized MiniLM ONNX model
+ONNX_MODEL_DIR = Path(__file__).parent.parent / 'data' / 'onnx' / 'all-MiniLM-L6-v2'
+
+
+class OnnxEmbeddingModel:
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime with dynamic INT8 quantization.
+    
+    Drop-in for the subset of SentenceTransformer used by the ingestion
+    scripts (encode / get_sentence_embedding_dimension). The model is
+    exported and quantized with optimum on first use, then cached on disk.
+    INT8 matmuls run fastest on CPUs with VNNI.
+    """
+    
+    def __init__(self, model_name: str = 'sentence-transformers/all-MiniLM-L6-v2',
+                 model_dir: Path = ONNX_MODEL_DIR, max_length: int = 256):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+        
+        model_dir = Path(model_dir)
+        model_path = model_dir / 'model_quantized.onnx'
+        if not model_path.exists():
+            self._export(model_name, model_dir)
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.session = ort.InferenceSession(
+            str(model_path), providers=['CPUExecutionProvider']
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dimension = AutoConfig.from_pretrained(model_dir).hidden_size
+        self.max_length = max_length
+    
+    @staticmethod
+    def _export(model_name: str, model_dir: Path):
+        """Export the model to ONNX and write a dynamically quantized copy."""
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+        
+        print(f"🔄 Exporting {model_name} to ONNX (INT8)...")
+        ort_model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        quantizer = ORTQuantizer.from_pretrained(ort_model)
+        quantizer.quantize(
+            save_dir=model_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        )
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+        print(f"✅ ONNX model saved to {model_dir}")
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+    
+    def encode(self, texts: List[str], batch_size: int = 32,
+               show_progress_bar: bool = False, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False) -> np.ndarray:
+        """
+        Encode texts with mean pooling, matching SentenceTransformer output.
+        
+        Returns:
+            numpy array of shape (len(texts), dimension)
+        """
+        out = np.empty((len(texts), self._dimension), dtype=np.float32)
+        
+        # Batch texts of similar length together so little compute is spent
+        # on padding; results are scattered back to input order
+        order = np.argsort([len(t) for t in texts], kind='stable')
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            batch = self.tokenizer(
+                [texts[i] for i in idx], padding=True, truncation=True,
+                max_length=self.max_length, return_tensors='np'
+            )
+            feeds = {k: v.astype(np.int64) for k, v in batch.items() if k in self._input_names}
+            hidden = self.session.run(None, feeds)[0]
+            
+            # Mean pooling over non-padding tokens
+            out[idx] = mean_pool(hidden, batch['attention_mask'])
+        
+        if normalize_embeddings:
+            out = l2_normalize(out)
+        return out
+
+
 # Singleton instance for convenience
 _embedding_service = None
 
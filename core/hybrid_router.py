@@ -289,6 +289,67 @@ class HybridQueryRouter:
         
         print(f"Loaded transformer model from {model_dir}")
     
+    # ==================== WARM STATE ====================
+    
+    def save_warm_state(self, path: str):
+        """
+        Save the loaded model and tokenizer so a later run can skip loading.
+        
+        Only PyTorch models (LSTM/transformer) can be saved; an ONNX
+        session isn't picklable.
+        
+        Args:
+            path: File to write, e.g. models/router_lstm/warm.pt
+        """
+        import torch
+        
+        if self._model is None and self._onnx_session is None:
+            self._load_model()
+        if self._model is None:
+            raise ValueError("No PyTorch model loaded; nothing to save")
+        
+        torch.save({
+            "model_path": self.model_path,
+            "use_onnx": self.use_onnx,
+            "confidence_threshold": self.confidence_threshold,
+            "model_type": self._model_type,
+            "model_config": self._model_config,
+            "model": self._model,
+            "tokenizer": self._tokenizer,
+        }, path)
+    
+    @classmethod
+    def load_warm_state(cls, path: str) -> "HybridQueryRouter":
+        """
+        Build a router from a save_warm_state() file, with fresh stats.
+        
+        Weights are memory-mapped rather than copied in (torch >= 2.1).
+        
+        Args:
+            path: File written by save_warm_state()
+        
+        Returns:
+            HybridQueryRouter with its model already loaded
+        """
+        import torch
+        
+        try:
+            state = torch.load(path, map_location="cpu", mmap=True, weights_only=False)
+        except TypeError:  # torch < 2.1 has no mmap
+            state = torch.load(path, map_location="cpu", weights_only=False)
+        
+        router = cls(
+            model_path=state["model_path"],
+            use_onnx=state["use_onnx"],
+            confidence_threshold=state["confidence_threshold"]
+        )
+        router._model_type = state["model_type"]
+        router._model_config = state["model_config"]
+        router._model = state["model"]
+        router._model.eval()
+        router._tokenizer = state["tokenizer"]
+        return router
+
     # ==================== ROUTING LOGIC ====================
     
     def route(self, query: str, budget: Optional[float] = None, afig_context: Dict = None) -> str:
@@ -364,6 +425,75 @@ class HybridQueryRouter:
         self._update_stats(default_result)
         return default_result
     
+    def route_detailed_batch(
+        self,
+        queries: List[str],
+        budgets: Optional[List[Optional[float]]] = None
+    ) -> List[RouteResult]:
+        """
+        Route several queries, running the model once for all that need it.
+        
+        Args:
+            queries: The search query strings.
+            budgets: Optional budget per query (None entries are parsed
+                     from the query, as in route_detailed).
+        
+        Returns:
+            RouteResults in the order of `queries`. latency_ms is the batch
+            time averaged over its queries.
+        """
+        start_time = time.perf_counter()
+        budgets = list(budgets) if budgets is not None else [None] * len(queries)
+        
+        # Stage 1: Fast deterministic rules for every query
+        results: List[Optional[RouteResult]] = []
+        rule_results: List[Optional[RouteResult]] = []
+        pending: List[int] = []  # Indices that need the model
+        for i, query in enumerate(queries):
+            query_lower = query.lower().strip()
+            if budgets[i] is None:
+                budgets[i] = self._extract_budget(query_lower)
+            
+            rule_result = self._apply_rules(query_lower, budgets[i])
+            rule_results.append(rule_result)
+            if rule_result is not None and rule_result.confidence >= self.confidence_threshold:
+                results.append(rule_result)
+            else:
+                results.append(None)
+                pending.append(i)
+        
+        # Stage 2: One model forward pass over the ambiguous queries
+        if pending and self.model_path is not None:
+            model_results = self._apply_model_batch(
+                [queries[i] for i in pending], [budgets[i] for i in pending]
+            )
+            for i, model_result in zip(pending, model_results):
+                if model_result is not None:
+                    # Merge with rule insights
+                    if rule_results[i] is not None:
+                        model_result.categories = rule_results[i].categories
+                        model_result.is_bundle = rule_results[i].is_bundle
+                    results[i] = model_result
+        
+        # Fallback to rule result (even if low confidence) or default
+        for i in pending:
+            if results[i] is None:
+                results[i] = rule_results[i] or RouteResult(
+                    path=RoutePath.SMART,
+                    confidence=0.5,
+                    method="default",
+                    latency_ms=0,
+                    categories=[],
+                    is_bundle=False,
+                    budget=budgets[i]
+                )
+        
+        latency_ms = (time.perf_counter() - start_time) * 1000 / max(len(queries), 1)
+        for result in results:
+            result.latency_ms = latency_ms
+            self._update_stats(result)
+        return results
+    
     def _apply_rules(self, query: str, budget: Optional[float]) -> Optional[RouteResult]:
         """Apply fast deterministic rules."""
         
@@ -516,47 +646,48 @@ class HybridQueryRouter:
     
     def _apply_model(self, query: str, budget: Optional[float]) -> Optional[RouteResult]:
         """Apply ML model for classification."""
+        return self._apply_model_batch([query], [budget])[0]
+    
+    def _apply_model_batch(self, queries: List[str],
+                           budgets: List[Optional[float]]) -> List[Optional[RouteResult]]:
+        """Apply ML model to several queries in one forward pass."""
         
         # Lazy load model
         if self._model is None and self._onnx_session is None:
             self._load_model()
         
         if self._model is None and self._onnx_session is None:
-            return None
+            return [None] * len(queries)
         
         try:
             import torch
             
-            # Tokenize
+            # Tokenize; every row is padded to max_length, so rows stack
             max_length = self._model_config.get("max_length", 64) if self._model_config else 64
-            inputs = self._tokenizer(
-                query, 
-                truncation=True, 
-                padding="max_length",
-                max_length=max_length,
-                return_tensors="pt"
-            )
+            encoded = [
+                self._tokenizer(
+                    query, 
+                    truncation=True, 
+                    padding="max_length",
+                    max_length=max_length,
+                    return_tensors="pt"
+                )
+                for query in queries
+            ]
+            inputs = {key: torch.cat([e[key] for e in encoded]) for key in encoded[0].keys()}
             
             # Inference
             if self._onnx_session is not None:
                 # ONNX inference
                 import numpy as np
-                if isinstance(inputs["input_ids"], torch.Tensor):
-                    input_ids = inputs["input_ids"].numpy()
-                else:
-                    input_ids = np.array([inputs["input_ids"]])
-                
-                ort_inputs = {"input_ids": input_ids}
+                ort_inputs = {"input_ids": inputs["input_ids"].numpy()}
                 if "attention_mask" in inputs:
-                    if isinstance(inputs["attention_mask"], torch.Tensor):
-                        ort_inputs["attention_mask"] = inputs["attention_mask"].numpy()
-                    else:
-                        ort_inputs["attention_mask"] = np.array([inputs["attention_mask"]])
+                    ort_inputs["attention_mask"] = inputs["attention_mask"].numpy()
                 
                 logits = self._onnx_session.run(None, ort_inputs)[0]
-                probs = self._softmax(logits[0])
-                pred = int(np.argmax(probs))
-                confidence = float(probs[pred])
+                probs = self._softmax(logits)
+                preds = np.argmax(probs, axis=-1).tolist()
+                confidences = probs[np.arange(len(preds)), preds].tolist()
             else:
                 # PyTorch inference
                 with torch.no_grad():
@@ -567,31 +698,34 @@ class HybridQueryRouter:
                         logits = outputs.logits
                     
                     probs = torch.softmax(logits, dim=-1)
-                    pred = probs.argmax(-1).item()
-                    confidence = probs[0, pred].item()
+                    confidence, pred = probs.max(-1)
+                    preds, confidences = pred.tolist(), confidence.tolist()
             
             # Map prediction to path
             path_map = {0: RoutePath.FAST, 1: RoutePath.SMART, 2: RoutePath.DEEP}
             
-            return RouteResult(
-                path=path_map[pred],
-                confidence=confidence,
-                method="model",
-                latency_ms=0,
-                categories=[],
-                is_bundle=False,
-                budget=budget
-            )
+            return [
+                RouteResult(
+                    path=path_map[pred],
+                    confidence=confidence,
+                    method="model",
+                    latency_ms=0,
+                    categories=[],
+                    is_bundle=False,
+                    budget=budget
+                )
+                for pred, confidence, budget in zip(preds, confidences, budgets)
+            ]
         
         except Exception as e:
             print(f"Model inference error: {e}")
-            return None
+            return [None] * len(queries)
     
     def _softmax(self, x):
-        """Compute softmax."""
+        """Compute softmax over the last axis."""
         import numpy as np
-        exp_x = np.exp(x - np.max(x))
-        return exp_x / exp_x.sum()
+        exp_x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+        return exp_x / exp_x.sum(axis=-1, keepdims=True)
     
     # ==================== HELPER METHODS ====================
     
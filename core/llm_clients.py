@@ -0,0 +1,46 @@
+"""
+LLM Clients
+Process-wide Groq clients, so callers share one keep-alive connection pool
+"""
+from functools import lru_cache
+
+import httpx
+
+try:
+    from groq import Groq
+    GROQ_AVAILABLE = True
+except ImportError:
+    GROQ_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+GROQ_LIMITS = httpx.Limits(max_keepalive_connections=10)
+GROQ_TIMEOUT = httpx.Timeout(60, connect=5)
+
+
+@lru_cache(maxsize=1)
+def get_groq_client(api_key: str) -> "Groq":
+    """
+    Get the shared Groq client for an API key.
+
+    The first call builds the client; later calls reuse it, and with it the
+    open connections to api.groq.com (over HTTP/2 when h2 is installed).
+
+    Args:
+        api_key: Groq API key
+
+    Returns:
+        Groq client
+    """
+    if not GROQ_AVAILABLE:
+        raise ImportError("groq package not installed")
+
+    # A plain httpx.Client works on every groq release (DefaultHttpxClient
+    # only exists in newer ones); the timeout matches groq's default
+    http_client = httpx.Client(http2=HTTP2_AVAILABLE, limits=GROQ_LIMITS,
+                               timeout=GROQ_TIMEOUT, follow_redirects=True)
+    return Groq(api_key=api_key, http_client=http_client)
@@ -0,0 +1,176 @@
+"""
+Semantic Result Cache
+In-process LRU cache of search results, matched on query meaning
+
+A query hits on its exact normalized text, or on the nearest cached query
+embedding with cosine >= threshold, within the same user, archetype and
+budget. Entries expire after a TTL, like the fast-path cache.
+"""
+import copy
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', query.lower()).split())
+
+
+class SemanticResultCache:
+    """
+    LRU cache of search payloads with an embedding index for near-duplicates.
+    
+    Query embeddings are unit rows of one preallocated float32 matrix, so a
+    semantic lookup is a single BLAS matrix-vector product over the cache
+    (float16 would halve its ~15 MB but numpy has no fast float16 matmul).
+    Entries stored without an embedding only match exactly. Payloads are
+    stored and returned as deep copies.
+    """
+    
+    def __init__(self, max_entries: int = 10_000, threshold: float = 0.97,
+                 dim: int = 384, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        
+        # key -> (row or None, expires_at, payload), least recently used first
+        self._entries: "OrderedDict[Tuple, Tuple[Optional[int], float, Dict[str, Any]]]" = OrderedDict()
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._row_keys: Dict[int, Tuple] = {}
+        self._free_rows = list(range(max_entries - 1, -1, -1))
+        
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _scope(user_id: str, archetype: str, budget: Optional[float]) -> Tuple:
+        """
+        Results are only shared within one user, archetype and exact budget.
+        
+        Paths filter on price <= budget, so a result computed for any other
+        budget could hold items the request can't afford.
+        """
+        return (user_id, archetype, None if budget is None else float(budget))
+    
+    def key(self, query: str, user_id: str, archetype: str, budget: Optional[float]) -> Tuple:
+        """Exact cache key for a search."""
+        return (normalize_query(query),) + self._scope(user_id, archetype, budget)
+    
+    def get(self, query: str, user_id: str, archetype: str, budget: Optional[float],
+            query_vec: Optional[np.ndarray] = None, cart_ids: Iterable[str] = (),
+            count_miss: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached payload.
+        
+        Args:
+            query: Search query
+            user_id: User the results were computed for
+            archetype: User's AFIG archetype
+            budget: Search budget
+            query_vec: Query embedding; enables the semantic match
+            cart_ids: Product IDs to filter out of the cached results
+            count_miss: Whether a miss counts in the stats (off for a probe
+                        that is followed by another lookup)
+        
+        Returns:
+            A copy of the cached payload, or None on a miss
+        """
+        key = self.key(query, user_id, archetype, budget)
+        if not self._live(key) and query_vec is not None:
+            key = self._nearest(key[1:], query_vec)
+            if key is not None:
+                self.semantic_hits += 1
+        
+        if key is None or not self._live(key):
+            if count_miss:
+                self.misses += 1
+            return None
+        
+        self.hits += 1
+        self._entries.move_to_end(key)
+        payload = copy.deepcopy(self._entries[key][2])
+        
+        cart_ids = set(cart_ids)
+        if cart_ids and 'results' in payload:
+            payload['results'] = [
+                r for r in payload['results'] if r.get('product_id') not in cart_ids
+            ]
+        return payload
+    
+    def put(self, query: str, user_id: str, archetype: str, budget: Optional[float],
+            query_vec: Optional[np.ndarray], payload: Dict[str, Any]):
+        """
+        Store a payload, evicting the least recently used entry if full.
+        
+        Without query_vec the entry is only found by its exact query.
+        """
+        key = self.key(query, user_id, archetype, budget)
+        if key in self._entries:
+            self._remove(key)
+        elif len(self._entries) >= self.max_entries:
+            self._remove(next(iter(self._entries)))
+        
+        row = None
+        if query_vec is not None:
+            row = self._free_rows.pop()
+            norm = np.linalg.norm(query_vec)
+            self._vectors[row] = query_vec / norm if norm else 0
+            self._row_keys[row] = key
+        self._entries[key] = (row, time.monotonic() + self.ttl, copy.deepcopy(payload))
+    
+    def _live(self, key: Tuple) -> bool:
+        """Whether `key` is cached and unexpired; expired entries are dropped."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if entry[1] <= time.monotonic():
+            self._remove(key)
+            return False
+        return True
+    
+    def _remove(self, key: Tuple):
+        row = self._entries.pop(key)[0]
+        if row is not None:
+            del self._row_keys[row]
+            self._vectors[row] = 0
+            self._free_rows.append(row)
+    
+    def _nearest(self, scope: Tuple, query_vec: np.ndarray) -> Optional[Tuple]:
+        """Most similar live cached key in `scope` above the threshold."""
+        if not self._row_keys:
+            return None
+        
+        norm = np.linalg.norm(query_vec)
+        if not norm:
+            return None
+        sims = self._vectors @ (query_vec / norm).astype(np.float32)
+        
+        candidates = np.flatnonzero(sims >= self.threshold)
+        for row in candidates[np.argsort(-sims[candidates])]:
+            key = self._row_keys.get(int(row))
+            if key is not None and key[1:] == scope and self._live(key):
+                return key
+        return None
+    
+    def clear(self):
+        """Drop every entry."""
+        self._entries.clear()
+        self._row_keys.clear()
+        self._vectors[:] = 0
+        self._free_rows = list(range(self.max_entries - 1, -1, -1))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups * 100 if lookups else 0
+        }
@@ -15,11 +15,7 @@ from typing import Dict, Any, Optional, List, Set
 from dataclasses import dataclass, field
 from enum import Enum
 
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
+from core.llm_clients import GROQ_AVAILABLE, get_groq_client
 
 
 class RoutePath(Enum):
@@ -296,7 +292,7 @@ Respond with ONLY valid JSON (no markdown):
             return
             
         try:
-            self._groq_client = Groq(api_key=api_key)
+            self._groq_client = get_groq_client(api_key)
             print("✅ Groq LLM router initialized")
         except Exception as e:
             print(f"⚠️ Groq init failed: {e}, using regex-only routing")
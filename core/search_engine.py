@@ -13,6 +13,7 @@ from core.afig import AFIG
 from core.hybrid_router import HybridQueryRouter
 from core.embeddings import EmbeddingService
 from core.taxonomy import disambiguate_search, CategoryTaxonomy
+from core.result_cache import SemanticResultCache
 from db.products import get_popular_products_by_category
 
 # Retrieval imports
@@ -51,6 +52,7 @@ class FinBundleEngine:
         self.optimizer = BundleOptimizer()
         self.agent = BudgetPathfinderAgent()
         self.explainer = LLMExplainer()
+        self.result_cache = SemanticResultCache()
         
     async def search(self, query: str, user_id: str, 
                     budget: float, cart: List[Dict] = None,
@@ -67,9 +69,32 @@ class FinBundleEngine:
             afig = AFIG(user_id)
             afig_context = afig.reconcile()
             afig.update_situational({'mission': query, 'budget_override': budget})
-        
-            # 2. Route Query
-            path = self.router.route(query, budget, afig_context)
+            
+            # Repeat queries skip routing and retrieval
+            cart_ids = {item.get('product_id') for item in cart if item.get('product_id')}
+            archetype = afig_context.get('archetype', 'default')
+            query_vec = None
+            result = self.result_cache.get(query, user_id, archetype, budget,
+                                           cart_ids=cart_ids, count_miss=False)
+            if result is None:
+                # 2. Route Query
+                path = self.router.route(query, budget, afig_context)
+                
+                # The smart path embeds the query anyway; with that vector a
+                # near-duplicate of a cached query hits too
+                if path == "smart":
+                    query_vec = self.embedder.encode_query(query)
+                result = self.result_cache.get(query, user_id, archetype, budget,
+                                               query_vec, cart_ids)
+            if result is not None:
+                result['metrics'] = {
+                    'total_latency_ms': round((time.time() - start_time) * 1000, 2),
+                    'path_used': result.get('path'),
+                    'user_id': user_id,
+                    'result_cache_hit': True
+                }
+                afig.update_behavioral({'type': 'search', 'query': query})
+                return result
             
             # 3. Execute Path Logic with Timeouts
             try:
@@ -77,7 +102,7 @@ class FinBundleEngine:
                     result = await self._fast_path(query, budget, afig_context, cart)
                 elif path == "smart":
                     result = await asyncio.wait_for(
-                        self._smart_path(query, budget, afig_context, cart), 
+                        self._smart_path(query, budget, afig_context, cart, query_vec), 
                         timeout=0.5
                     )
                 else:  # deep
@@ -89,10 +114,15 @@ class FinBundleEngine:
                 print(f"⚠️ Path {path} timed out! Falling back to fast/smart path.")
                 # Fallback logic
                 if path == "deep":
-                     result = await self._smart_path(query, budget, afig_context, cart)
+                     result = await self._smart_path(query, budget, afig_context, cart, query_vec)
                 else:
                      result = await self._fast_path(query, budget, afig_context, cart)
                 result['metrics'] = {'note': 'Fallback due to timeout'}
+            
+            # Cache fast/smart results computed without a cart; a cart only
+            # removes items, so cached results are cart-filtered on the way out
+            if path in ("fast", "smart") and not cart and 'metrics' not in result:
+                self.result_cache.put(query, user_id, archetype, budget, query_vec, result)
                 
             # 4. Metrics & Logging
             total_latency = (time.time() - start_time) * 1000
@@ -166,7 +196,8 @@ class FinBundleEngine:
         print(f"⚡ Fast path found no results for '{query}', falling back to smart path")
         return await self._smart_path(query, budget, afig_context, cart)
 
-    async def _smart_path(self, query: str, budget: float, afig_context: Dict, cart: List[Dict] = None) -> Dict:
+    async def _smart_path(self, query: str, budget: float, afig_context: Dict, cart: List[Dict] = None,
+                          query_vec: Optional[np.ndarray] = None) -> Dict:
         """
         Smart Path: Vector Search + LearnedProductScorer + Feasibility (<300ms)
         
@@ -186,7 +217,8 @@ class FinBundleEngine:
         scorer = get_scorer()
         
         # Encode query and L2 normalize for dot product similarity
-        query_vec = self.embedder.encode_query(query)
+        if query_vec is None:
+            query_vec = self.embedder.encode_query(query)
         query_vec_normalized = query_vec / np.linalg.norm(query_vec)
         
         # === OPTIONAL DISAMBIGUATION (helps but not critical with 500K products) ===
@@ -202,25 +234,29 @@ class FinBundleEngine:
         # Extract main product keyword from query (e.g., "4k monitors" -> "monitor")
         main_keyword = self._extract_main_product_keyword(query)
         
-        # First: Try text search for products with the keyword in name
-        text_results = []
+        # Semantic search for broader matches
+        query_vector = query_vec.tolist()
+        max_price = budget * 1.2 if budget else None
+        searches = [dict(
+            query_vector=query_vector,
+            max_price=max_price,
+            categories=boost_categories if boost_categories else None,
+            limit=100
+        )]
+        
+        # Plus text search for products with the keyword in name
         if main_keyword:
-            text_results = self.qdrant.search_with_constraints(
-                query_vector=query_vec.tolist(),
-                max_price=budget * 1.2 if budget else None,
+            searches.append(dict(
+                query_vector=query_vector,
+                max_price=max_price,
                 text_query=main_keyword,  # Text search in product name
-                limit=50,
-                use_acorn=True
-            )
+                limit=50
+            ))
         
-        # Second: Semantic search for broader matches
-        semantic_results = self.qdrant.search_with_constraints(
-            query_vector=query_vec.tolist(),
-            max_price=budget * 1.2 if budget else None,
-            categories=boost_categories if boost_categories else None,
-            limit=100,
-            use_acorn=True
-        )
+        # Both searches go to Qdrant in one round-trip
+        batch_results = self.qdrant.search_batch_with_constraints(searches, use_acorn=True)
+        semantic_results = batch_results[0]
+        text_results = batch_results[1] if main_keyword else []
         
         # Combine results: text matches first (more relevant), then semantic
         seen_ids = set()
@@ -353,28 +389,32 @@ class FinBundleEngine:
         all_candidates = []
         budget_per_category = budget / max(len(target_categories), 1)
         
+        # Allow higher budget per item for quality - up to 60% of total budget
+        # This ensures we get premium products, not just cheap ones
+        max_price_per_item = min(budget * 0.6, budget_per_category * 2)
+        
+        searches = []
         for category in target_categories:
             # IMPORTANT: Include original query context for better relevance
             # E.g., "gaming laptop" instead of just "laptop"
             category_query = f"{context_keywords} {category}".strip()
             query_vec = self.embedder.encode_query(category_query)
             
-            # Allow higher budget per item for quality - up to 60% of total budget
-            # This ensures we get premium products, not just cheap ones
-            max_price_per_item = min(budget * 0.6, budget_per_category * 2)
-            
             # Get more candidates for this category
-            candidates = self.qdrant.search_with_constraints(
+            searches.append(dict(
                 query_vector=query_vec.tolist(),
                 max_price=max_price_per_item,
                 text_query=category,  # Must contain category keyword
                 limit=40  # Get more candidates for better quality selection
-            )
-            
-            # Tag with target category and query context
+            ))
+        
+        # All category searches go to Qdrant in one round-trip
+        batch_results = self.qdrant.search_batch_with_constraints(searches)
+        
+        for category, candidates in zip(target_categories, batch_results):
+            # Tag with target category
             for c in candidates:
-                c._bundle_category = category
-                c._query_context = context_keywords
+                c.bundle_category = category
             all_candidates.extend(candidates)
         
         # Enrich with full DB data
@@ -389,7 +429,7 @@ class FinBundleEngine:
         
         for c in all_candidates:
             # Get bundle category (what we searched for) or fall back to product category
-            bundle_cat = getattr(c, '_bundle_category', None) or c.category
+            bundle_cat = c.bundle_category or c.category
             
             # Calculate utility: PRIORITIZE QUALITY for bundle purchases
             # Users with higher budget want BETTER products, not just more products
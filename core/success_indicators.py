@@ -119,20 +119,23 @@ class SuccessIndicators:
         self._active_sessions: Dict[str, SearchSession] = {}
         self._session_impressions: Dict[str, List[Impression]] = defaultdict(list)
         
+        # Rows held back during bulk_track, written once per file
+        self._pending_writes: Optional[Dict[Path, List[Dict]]] = None
+        
     # =========================================================================
     # EVENT TRACKING
     # =========================================================================
     
     def start_session(self, session_id: str, user_id: str, query: str, 
                       budget: float, results_count: int, path: str, 
-                      latency_ms: float) -> str:
+                      latency_ms: float, ts: Optional[datetime] = None) -> str:
         """Start tracking a new search session."""
         session = SearchSession(
             session_id=session_id,
             user_id=user_id,
             query=query,
             budget=budget,
-            start_time=datetime.now().isoformat(),
+            start_time=(ts or datetime.now()).isoformat(),
             first_click_time=None,
             cart_add_time=None,
             results_count=results_count,
@@ -144,7 +147,7 @@ class SuccessIndicators:
         return session_id
     
     def track_impressions(self, session_id: str, products: List[Dict], 
-                          budget: float, query: str):
+                          budget: float, query: str, ts: Optional[datetime] = None):
         """
         Track product impressions (products shown to user).
         
@@ -153,8 +156,9 @@ class SuccessIndicators:
             products: List of products shown (with product_id, price)
             budget: User's budget
             query: Search query
+            ts: Event time override (defaults to now)
         """
-        timestamp = datetime.now().isoformat()
+        timestamp = (ts or datetime.now()).isoformat()
         
         for position, product in enumerate(products):
             price = product.get('price', 0)
@@ -173,13 +177,15 @@ class SuccessIndicators:
             self._write_event(self.impressions_file, asdict(impression))
     
     def track_click(self, session_id: str, product_id: str, 
-                    position: int, price: float, budget: float) -> Dict:
+                    position: int, price: float, budget: float,
+                    ts: Optional[datetime] = None) -> Dict:
         """
         Track a product click.
         
+        `ts` overrides the event time (simulations use a simulated clock).
         Returns click metrics for the frontend.
         """
-        now = datetime.now()
+        now = ts or datetime.now()
         timestamp = now.isoformat()
         
         # Calculate time to click
@@ -214,11 +220,14 @@ class SuccessIndicators:
     
     def track_cart_add(self, session_id: str, product_id: str, 
                        price: float, budget: float, 
-                       is_recommended: bool = False) -> Dict:
+                       is_recommended: bool = False,
+                       ts: Optional[datetime] = None) -> Dict:
         """
         Track adding a product to cart.
+        
+        `ts` overrides the event time (simulations use a simulated clock).
         """
-        now = datetime.now()
+        now = ts or datetime.now()
         timestamp = now.isoformat()
         
         # Update session
@@ -254,8 +263,49 @@ class SuccessIndicators:
             if session_id in self._session_impressions:
                 del self._session_impressions[session_id]
     
+    def bulk_track(self, events: List[tuple]):
+        """
+        Replay buffered events in order, appending each event log once.
+        
+        Args:
+            events: (kind, kwargs) pairs; kind is "search" (start_session
+                plus track_impressions arguments), "click", "cart_add" or
+                "end_session", with the matching method's kwargs
+        """
+        handlers = {
+            "click": self.track_click,
+            "cart_add": self.track_cart_add,
+            "end_session": self.end_session,
+        }
+        
+        self._pending_writes = defaultdict(list)
+        try:
+            for kind, kwargs in events:
+                if kind == "search":
+                    kwargs = dict(kwargs)
+                    products = kwargs.pop("results")
+                    self.start_session(results_count=len(products), **kwargs)
+                    self.track_impressions(
+                        session_id=kwargs["session_id"],
+                        products=products,
+                        budget=kwargs["budget"],
+                        query=kwargs["query"],
+                        ts=kwargs.get("ts")
+                    )
+                else:
+                    handlers[kind](**kwargs)
+        finally:
+            pending, self._pending_writes = self._pending_writes, None
+        
+        for file_path, rows in pending.items():
+            with open(file_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(row) + "\n" for row in rows))
+    
     def _write_event(self, file_path: Path, data: Dict):
         """Append event to JSONL file."""
+        if self._pending_writes is not None:
+            self._pending_writes[file_path].append(data)
+            return
         with open(file_path, "a", encoding="utf-8") as f:
             f.write(json.dumps(data) + "\n")
     
@@ -680,26 +730,30 @@ def track_search(session_id: str, user_id: str, query: str, budget: float,
 
 
 def track_click(session_id: str, product_id: str, position: int,
-                price: float, budget: float) -> Dict:
+                price: float, budget: float,
+                ts: Optional[datetime] = None) -> Dict:
     """Convenience function to track a click."""
     return get_indicators().track_click(
         session_id=session_id,
         product_id=product_id,
         position=position,
         price=price,
-        budget=budget
+        budget=budget,
+        ts=ts
     )
 
 
 def track_cart_add(session_id: str, product_id: str, price: float,
-                   budget: float, is_recommended: bool = False) -> Dict:
+                   budget: float, is_recommended: bool = False,
+                   ts: Optional[datetime] = None) -> Dict:
     """Convenience function to track a cart add."""
     return get_indicators().track_cart_add(
         session_id=session_id,
         product_id=product_id,
         price=price,
         budget=budget,
-        is_recommended=is_recommended
+        is_recommended=is_recommended,
+        ts=ts
     )
 
 
@@ -7,7 +7,9 @@ from db.products import (
     create_products_table,
     insert_products,
     get_product_by_id,
-    get_products_by_ids
+    get_products_by_ids,
+    get_products_by_ids_cached,
+    clear_product_cache
 )
 
 __all__ = [
@@ -16,5 +18,7 @@ __all__ = [
     'create_products_table',
     'insert_products',
     'get_product_by_id',
-    'get_products_by_ids'
+    'get_products_by_ids',
+    'get_products_by_ids_cached',
+    'clear_product_cache'
 ]
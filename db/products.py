@@ -2,7 +2,11 @@
 Product Database Operations
 PostgreSQL CRUD for Amazon products
 """
+import copy
 import json
+import orjson
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field, asdict
 
@@ -186,14 +190,16 @@ def insert_products(products: List[Product], batch_size: int = 100) -> int:
             p.rating,
             p.rating_count,
             p.description,
-            json.dumps(p.features),
+            orjson.dumps(p.features).decode(),
             p.image_url,
-            json.dumps(p.details),
+            orjson.dumps(p.details).decode(),
             p.in_stock,
             p.condition
         ))
     
     count = execute_many(INSERT_PRODUCT_SQL, data, page_size=batch_size)
+    # Cached rows may now be stale
+    clear_product_cache()
     return count
 
 
@@ -258,6 +264,59 @@ def get_products_by_ids(product_ids: List[str]) -> List[Dict]:
     return products
 
 
+# Row-level LRU cache for search enrichment (hot products recur across queries)
+PRODUCT_CACHE_SIZE = 4096
+_product_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_product_cache_lock = threading.Lock()  # FastAPI runs this on threadpool workers
+
+
+def get_products_by_ids_cached(product_ids: List[str]) -> List[Dict]:
+    """
+    Get multiple products by IDs, serving hot rows from an in-process LRU.
+    
+    Only IDs missing from the cache hit PostgreSQL; fetched rows are
+    cached for subsequent searches. Callers get copies, so mutating a
+    returned row never changes the cache.
+    
+    Args:
+        product_ids: List of product IDs
+    
+    Returns:
+        List of product dicts
+    """
+    if not product_ids:
+        return []
+    
+    products = []
+    missing = []
+    with _product_cache_lock:
+        for pid in product_ids:
+            row = _product_cache.get(pid)
+            if row is None:
+                missing.append(pid)
+            else:
+                _product_cache.move_to_end(pid)
+                products.append(copy.deepcopy(row))
+    
+    if missing:
+        # Fetch outside the lock so other threads keep serving hits
+        fetched = get_products_by_ids(missing)
+        with _product_cache_lock:
+            for row in fetched:
+                _product_cache[row['product_id']] = row
+            while len(_product_cache) > PRODUCT_CACHE_SIZE:
+                _product_cache.popitem(last=False)
+        products.extend(copy.deepcopy(row) for row in fetched)
+    
+    return products
+
+
+def clear_product_cache() -> None:
+    """Drop all cached product rows (call after product updates)."""
+    with _product_cache_lock:
+        _product_cache.clear()
+
+
 def get_product_count() -> int:
     """Get total product count."""
     result = execute_query("SELECT COUNT(*) as count FROM products")
@@ -3,17 +3,28 @@ Qdrant Search Module
 Provides ANN search with payload filtering via Qdrant Cloud
 """
 import os
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+import heapq
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import List, Dict, Any, Optional, Tuple, FrozenSet
+from dataclasses import dataclass, fields
+
+import numpy as np
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 try:
+    import httpx
     from qdrant_client import QdrantClient
     from qdrant_client.models import (
         Filter, FieldCondition, MatchValue, MatchAny, MatchText, Range,
-        SearchParams, AcornSearchParams
+        SearchParams, AcornSearchParams, QueryRequest, PayloadSelectorInclude
     )
     QDRANT_AVAILABLE = True
 except ImportError:
@@ -32,8 +43,169 @@ ACORN_SEARCH_PARAMS = SearchParams(
     )
 ) if QDRANT_AVAILABLE else None
 
+# Only fetch the payload keys _to_search_result reads (skips large blobs)
+SEARCH_PAYLOAD = PayloadSelectorInclude(include=[
+    "product_id", "name", "category", "brand", "price", "rating",
+    "rating_count", "review_count", "condition", "in_stock",
+    "features", "description", "image_url", "details"
+]) if QDRANT_AVAILABLE else None
+
+# gRPC ships vectors as packed protobuf floats instead of JSON arrays
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+# Fail fast on the hot path rather than stacking slow requests
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "5"))
+
+# Keep connections warm so TLS handshakes are paid once, not per query
+QDRANT_HTTP_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=50
+) if QDRANT_AVAILABLE else None
+QDRANT_GRPC_OPTIONS = {
+    "grpc.keepalive_time_ms": 30000,
+    "grpc.max_concurrent_streams": 100,
+}
+
+
+def _create_client(url: str, api_key: Optional[str]) -> "QdrantClient":
+    """Create a Qdrant client using the configured transport and pool."""
+    return QdrantClient(
+        url=url,
+        api_key=api_key,
+        prefer_grpc=QDRANT_PREFER_GRPC,
+        grpc_port=QDRANT_GRPC_PORT,
+        grpc_options=QDRANT_GRPC_OPTIONS,
+        timeout=QDRANT_TIMEOUT,
+        limits=QDRANT_HTTP_LIMITS
+    )
+
+
+# MatchAny conditions for the (small, fixed) category/brand taxonomy, reused
+# across filters whose other constraints (e.g. price) differ
+_match_any_cache: Dict[Tuple[str, FrozenSet[str]], "FieldCondition"] = {}
+MATCH_ANY_CACHE_MAX = 1024
+
+
+def _match_any_condition(key: str, values: Tuple[str, ...]) -> "FieldCondition":
+    """Get the cached MatchAny FieldCondition for a key and value set."""
+    cache_key = (key, frozenset(values))
+    condition = _match_any_cache.get(cache_key)
+    if condition is None:
+        condition = FieldCondition(key=key, match=MatchAny(any=list(values)))
+        if len(_match_any_cache) < MATCH_ANY_CACHE_MAX:
+            _match_any_cache[cache_key] = condition
+    return condition
+
+
+def clear_filter_cache() -> None:
+    """Drop cached filters (call after a collection schema change)."""
+    _match_any_cache.clear()
+    _cached_constraint_filter.cache_clear()
+
+
+def _build_constraint_filter(max_price: Optional[float] = None,
+                             min_price: Optional[float] = None,
+                             category: Optional[str] = None,
+                             categories: Optional[List[str]] = None,
+                             brands: Optional[List[str]] = None,
+                             in_stock_only: bool = True,
+                             conditions: Optional[List[str]] = None,
+                             min_rating: Optional[float] = None,
+                             text_query: Optional[str] = None) -> Optional["Filter"]:
+    """Build a native Qdrant filter from search constraints (cached per signature)."""
+    return _cached_constraint_filter(
+        max_price, min_price, category,
+        tuple(categories) if categories else None,
+        tuple(brands) if brands else None,
+        in_stock_only,
+        tuple(conditions) if conditions else None,
+        min_rating, text_query
+    )
+
+
+@lru_cache(maxsize=256)
+def _cached_constraint_filter(max_price: Optional[float],
+                              min_price: Optional[float],
+                              category: Optional[str],
+                              categories: Optional[Tuple[str, ...]],
+                              brands: Optional[Tuple[str, ...]],
+                              in_stock_only: bool,
+                              conditions: Optional[Tuple[str, ...]],
+                              min_rating: Optional[float],
+                              text_query: Optional[str]) -> Optional["Filter"]:
+    """
+    Build the Filter for one constraint signature.
+    
+    Filters are Pydantic models and costly to validate; repeat constraint
+    sets (e.g. in-stock + category) reuse the same instance. Callers must
+    treat the returned Filter as read-only.
+    """
+    must_conditions = []
+    should_conditions = []
+    
+    # Price range filter
+    if max_price is not None or min_price is not None:
+        range_params = {}
+        if max_price is not None:
+            range_params["lte"] = max_price
+        if min_price is not None:
+            range_params["gte"] = min_price
+        must_conditions.append(
+            FieldCondition(key="price", range=Range(**range_params))
+        )
+    
+    # Single category filter
+    if category:
+        must_conditions.append(
+            FieldCondition(key="category", match=MatchValue(value=category))
+        )
+    
+    # Multiple categories (OR) - use MatchAny
+    if categories:
+        must_conditions.append(
+            _match_any_condition("category", categories)
+        )
+    
+    # Multiple brands (OR) - use MatchAny
+    if brands:
+        must_conditions.append(
+            _match_any_condition("brand", brands)
+        )
+    
+    # In stock filter
+    if in_stock_only:
+        must_conditions.append(
+            FieldCondition(key="in_stock", match=MatchValue(value=True))
+        )
+    
+    # Conditions filter (new, refurbished, etc.) - use MatchAny
+    if conditions:
+        must_conditions.append(
+            _match_any_condition("condition", conditions)
+        )
+    
+    # Rating filter
+    if min_rating is not None:
+        must_conditions.append(
+            FieldCondition(key="rating", range=Range(gte=min_rating))
+        )
+    
+    # Text search using text_any (Qdrant 1.13+)
+    # Matches products containing ANY of the query terms
+    if text_query:
+        must_conditions.append(
+            FieldCondition(key="name", match=MatchText(text=text_query))
+        )
+    
+    if not (must_conditions or should_conditions):
+        return None
+    
+    return Filter(
+        must=must_conditions if must_conditions else None,
+        should=should_conditions if should_conditions else None
+    )
+
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """Represents a single search result."""
     product_id: str
@@ -50,24 +222,104 @@ class SearchResult:
     image_url: str = ""
     description: str = ""
     specs: Dict = None
+    bundle_category: str = ""  # Deep path: bundle category this hit was retrieved for
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            'product_id': self.product_id,
-            'name': self.name,
-            'category': self.category,
-            'brand': self.brand,
-            'price': self.price,
-            'rating': self.rating,
-            'rating_count': self.rating_count,
-            'score': self.score,
-            'condition': self.condition,
-            'in_stock': self.in_stock,
-            'features': self.features,
-            'image_url': self.image_url,
-            'description': self.description,
-            'specs': self.specs or {}
-        }
+        data = dict(zip(_SR_FIELDS, _SR_GETTER(self)))
+        data['specs'] = self.specs or {}
+        return data
+
+
+# Serialized SearchResult fields, resolved once (bundle_category is internal)
+_SR_FIELDS = tuple(f.name for f in fields(SearchResult) if f.name != 'bundle_category')
+_SR_GETTER = attrgetter(*_SR_FIELDS)
+
+
+def _is_payload_complete(r: "SearchResult") -> bool:
+    """True if the Qdrant payload already carried every field enrichment fills."""
+    return bool(r.description and r.features and r.image_url) and r.specs is not None
+
+
+def _enrich_results(results: List["SearchResult"]) -> List["SearchResult"]:
+    """
+    Fill description/specs/image_url/features from PostgreSQL.
+    
+    Results whose payload is already complete are left untouched; when every
+    result is complete the database round-trip is skipped entirely.
+    """
+    from db.products import get_products_by_ids_cached
+    
+    if not results:
+        return []
+    
+    pending = [r for r in results if not _is_payload_complete(r)]
+    if not pending:
+        return list(results)
+    
+    product_ids = [r.product_id for r in pending]
+    db_products = {p['product_id']: p for p in get_products_by_ids_cached(product_ids)}
+    
+    for r in pending:
+        if r.product_id in db_products:
+            p = db_products[r.product_id]
+            # Update fields that might be truncated in Qdrant or missing
+            r.description = p.get('description', r.description)
+            r.specs = p.get('details', {})
+            r.image_url = p.get('image_url', "")
+            r.features = p.get('features', r.features)
+            r.rating_count = p.get('rating_count', r.rating_count)
+    
+    return list(results)
+
+
+# Reciprocal rank fusion constant
+RRF_K = 60
+# Fan-in above which RRF scores are accumulated in NumPy instead of a dict
+RRF_VECTORIZE_MIN = 512
+
+
+def _rrf_fuse(ranked_lists: List[List["SearchResult"]], weights: List[float],
+              limit: int, k: int = RRF_K) -> List["SearchResult"]:
+    """
+    Weighted reciprocal rank fusion over any number of ranked result lists.
+    
+    Each hit contributes weight / (rank + k); the first occurrence of a
+    product_id is the result returned for it.
+    """
+    total = sum(len(results) for results in ranked_lists)
+    
+    if total < RRF_VECTORIZE_MIN:
+        scores: Dict[str, float] = defaultdict(float)
+        results_by_id: Dict[str, SearchResult] = {}
+        for results, weight in zip(ranked_lists, weights):
+            for rank, r in enumerate(results):
+                scores[r.product_id] += weight / (rank + k)
+                results_by_id.setdefault(r.product_id, r)
+        
+        # Select top-k by fused score (no need to sort the discarded tail)
+        top = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        return [results_by_id[pid] for pid, _ in top]
+    
+    # Large fan-in: map ids to dense indices once, then score in C
+    index: Dict[str, int] = {}
+    unique: List[SearchResult] = []
+    ids = np.empty(total, dtype=np.int64)
+    contrib = np.empty(total, dtype=np.float64)
+    pos = 0
+    for results, weight in zip(ranked_lists, weights):
+        n = len(results)
+        contrib[pos:pos + n] = weight / (np.arange(n) + k)
+        for r in results:
+            i = index.setdefault(r.product_id, len(unique))
+            if i == len(unique):
+                unique.append(r)
+            ids[pos] = i
+            pos += 1
+    
+    scores_arr = np.zeros(len(unique), dtype=np.float64)
+    np.add.at(scores_arr, ids, contrib)
+    top_idx = np.argsort(-scores_arr, kind="stable")[:limit]
+    return [unique[i] for i in top_idx]
 
 
 class QdrantSearch:
@@ -81,32 +333,13 @@ class QdrantSearch:
         
         if QDRANT_AVAILABLE:
             self._init_client()
+            self.warm_filter_cache()
             
     def enrich_results(self, results: List[SearchResult]) -> List[SearchResult]:
         """
         Enrich Qdrant results with full details from PostgreSQL.
         """
-        from db.products import get_products_by_ids
-        
-        if not results:
-            return []
-            
-        product_ids = [r.product_id for r in results]
-        db_products = {p['product_id']: p for p in get_products_by_ids(product_ids)}
-        
-        enriched = []
-        for r in results:
-            if r.product_id in db_products:
-                p = db_products[r.product_id]
-                # Update fields that might be truncated in Qdrant or missing
-                r.description = p.get('description', r.description)
-                r.specs = p.get('details', {})
-                r.image_url = p.get('image_url', "")
-                r.features = p.get('features', r.features)
-                r.rating_count = p.get('rating_count', r.rating_count)
-            enriched.append(r)
-            
-        return enriched
+        return _enrich_results(results)
     
     def _init_client(self):
         """Initialize Qdrant client."""
@@ -118,13 +351,31 @@ class QdrantSearch:
             return
         
         try:
-            self._client = QdrantClient(
-                url=qdrant_url,
-                api_key=qdrant_api_key
-            )
+            self._client = _create_client(qdrant_url, qdrant_api_key)
         except Exception as e:
             print(f"⚠️ Qdrant client init failed: {e}")
     
+    def warm_filter_cache(self, top_categories: int = 50, top_brands: int = 100):
+        """
+        Prebuild category/brand MatchAny conditions for the catalog's
+        most common values (via Qdrant facets on the keyword indices).
+        """
+        if not self._client:
+            return
+        
+        for key, limit in (("category", top_categories), ("brand", top_brands)):
+            try:
+                facets = self._client.facet(
+                    collection_name=self.collection_name,
+                    key=key,
+                    limit=limit
+                )
+            except Exception as e:
+                logger.warning("Filter cache warmup failed for %s: %s", key, e)
+                continue
+            for hit in facets.hits:
+                _match_any_condition(key, (hit.value,))
+    
     @property
     def is_available(self) -> bool:
         """Check if Qdrant is available."""
@@ -161,13 +412,13 @@ class QdrantSearch:
                 query_filter=qdrant_filter,
                 search_params=search_params,
                 limit=limit,
-                with_payload=True
+                with_payload=SEARCH_PAYLOAD
             )
             
             return [self._to_search_result(r) for r in results.points]
             
         except Exception as e:
-            print(f"⚠️ Search error: {e}")
+            logger.warning("Search error: %s", e)
             return []
     
     def search_with_constraints(self, query_vector: List[float],
@@ -210,70 +461,17 @@ class QdrantSearch:
         
         try:
             # Build native Qdrant filter for server-side filtering
-            must_conditions = []
-            should_conditions = []
-            
-            # Price range filter
-            if max_price is not None or min_price is not None:
-                range_params = {}
-                if max_price is not None:
-                    range_params["lte"] = max_price
-                if min_price is not None:
-                    range_params["gte"] = min_price
-                must_conditions.append(
-                    FieldCondition(key="price", range=Range(**range_params))
-                )
-            
-            # Single category filter
-            if category:
-                must_conditions.append(
-                    FieldCondition(key="category", match=MatchValue(value=category))
-                )
-            
-            # Multiple categories (OR) - use MatchAny
-            if categories and len(categories) > 0:
-                must_conditions.append(
-                    FieldCondition(key="category", match=MatchAny(any=categories))
-                )
-            
-            # Multiple brands (OR) - use MatchAny
-            if brands and len(brands) > 0:
-                must_conditions.append(
-                    FieldCondition(key="brand", match=MatchAny(any=brands))
-                )
-            
-            # In stock filter
-            if in_stock_only:
-                must_conditions.append(
-                    FieldCondition(key="in_stock", match=MatchValue(value=True))
-                )
-            
-            # Conditions filter (new, refurbished, etc.) - use MatchAny
-            if conditions and len(conditions) > 0:
-                must_conditions.append(
-                    FieldCondition(key="condition", match=MatchAny(any=conditions))
-                )
-            
-            # Rating filter
-            if min_rating is not None:
-                must_conditions.append(
-                    FieldCondition(key="rating", range=Range(gte=min_rating))
-                )
-            
-            # Text search using text_any (Qdrant 1.13+)
-            # Matches products containing ANY of the query terms
-            if text_query:
-                must_conditions.append(
-                    FieldCondition(key="name", match=MatchText(text=text_query))
-                )
-            
-            # Build filter
-            qdrant_filter = None
-            if must_conditions or should_conditions:
-                qdrant_filter = Filter(
-                    must=must_conditions if must_conditions else None,
-                    should=should_conditions if should_conditions else None
-                )
+            qdrant_filter = _build_constraint_filter(
+                max_price=max_price,
+                min_price=min_price,
+                category=category,
+                categories=categories,
+                brands=brands,
+                in_stock_only=in_stock_only,
+                conditions=conditions,
+                min_rating=min_rating,
+                text_query=text_query
+            )
             
             # Use ACORN params when we have multiple filters for better relevance
             search_params = ACORN_SEARCH_PARAMS if (use_acorn and qdrant_filter) else None
@@ -284,19 +482,76 @@ class QdrantSearch:
                 query_filter=qdrant_filter,
                 search_params=search_params,
                 limit=limit,
-                with_payload=True
+                with_payload=SEARCH_PAYLOAD
             )
             
             return [self._to_search_result(r) for r in results.points]
             
         except Exception as e:
-            print(f"⚠️ Filtered search error: {e}")
+            logger.warning("Filtered search error: %s", e)
             # Fallback to Python-side filtering
             return self._search_with_python_filters(
                 query_vector, max_price, min_price, category, categories,
                 brands, in_stock_only, conditions, min_rating, limit
             )
     
+    def search_batch_with_constraints(self, queries: List[Dict],
+                                      use_acorn: bool = True) -> List[List[SearchResult]]:
+        """
+        Run several constrained searches in a single Qdrant round-trip.
+        
+        Each entry in ``queries`` holds the keyword arguments accepted by
+        search_with_constraints (query_vector, max_price, text_query, limit, ...).
+        
+        Args:
+            queries: List of search_with_constraints keyword dicts
+            use_acorn: Use ACORN for better filtered search (Qdrant 1.13+)
+            
+        Returns:
+            One result list per query, in the same order
+        """
+        if not self._client:
+            return [[] for _ in queries]
+        if len(queries) <= 1:
+            return [self.search_with_constraints(use_acorn=use_acorn, **q) for q in queries]
+        
+        try:
+            requests = []
+            for q in queries:
+                qdrant_filter = _build_constraint_filter(
+                    max_price=q.get("max_price"),
+                    min_price=q.get("min_price"),
+                    category=q.get("category"),
+                    categories=q.get("categories"),
+                    brands=q.get("brands"),
+                    in_stock_only=q.get("in_stock_only", True),
+                    conditions=q.get("conditions"),
+                    min_rating=q.get("min_rating"),
+                    text_query=q.get("text_query")
+                )
+                requests.append(QueryRequest(
+                    query=q["query_vector"],
+                    filter=qdrant_filter,
+                    params=ACORN_SEARCH_PARAMS if (use_acorn and qdrant_filter) else None,
+                    limit=q.get("limit", 20),
+                    with_payload=SEARCH_PAYLOAD
+                ))
+            
+            responses = self._client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=requests
+            )
+            
+            return [
+                [self._to_search_result(r) for r in response.points]
+                for response in responses
+            ]
+            
+        except Exception as e:
+            logger.warning("Batch search error: %s", e)
+            # Fallback to one request per query
+            return [self.search_with_constraints(use_acorn=use_acorn, **q) for q in queries]
+    
     def _search_with_python_filters(self, query_vector: List[float],
                                     max_price: Optional[float] = None,
                                     min_price: Optional[float] = None,
@@ -401,13 +656,13 @@ class QdrantSearch:
                 query_filter=qdrant_filter,
                 search_params=ACORN_SEARCH_PARAMS,
                 limit=limit,
-                with_payload=True
+                with_payload=SEARCH_PAYLOAD
             )
             
             return [self._to_search_result(r) for r in results.points]
             
         except Exception as e:
-            print(f"⚠️ Text search error: {e}")
+            logger.warning("Text search error: %s", e)
             return []
     
     def _build_filter(self, filter_dict: Dict) -> Filter:
@@ -460,31 +715,44 @@ class QdrantSearch:
             condition=payload.get("condition", "new"),
             in_stock=payload.get("in_stock", True),
             features=payload.get("features", []),
-            description=payload.get("description", "")
+            image_url=payload.get("image_url", ""),
+            description=payload.get("description", ""),
+            specs=payload.get("details")
         )
     
-    def get_by_category(self, category: str, limit: int = 50) -> List[Dict]:
-        """Get products by category (scroll, no vector needed)."""
+    def get_by_category(self, category: str, limit: int = 50,
+                        page_size: int = 256) -> List[Dict]:
+        """
+        Get products by category (scroll, no vector needed).
+        
+        Follows the scroll offset across pages until ``limit`` payloads
+        have been collected or the category is exhausted.
+        """
         if not self._client:
             return []
         
         try:
-            result = self._client.scroll(
-                collection_name=self.collection_name,
-                scroll_filter=Filter(
-                    must=[FieldCondition(
-                        key="category",
-                        match=MatchValue(value=category)
-                    )]
-                ),
-                limit=limit,
-                with_payload=True
-            )
+            scroll_filter = _build_constraint_filter(category=category, in_stock_only=False)
+            payloads = []
+            offset = None
+            
+            while len(payloads) < limit:
+                points, offset = self._client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=scroll_filter,
+                    limit=min(page_size, limit - len(payloads)),
+                    offset=offset,
+                    with_payload=True
+                )
+                payloads.extend(point.payload for point in points)
+                
+                if offset is None:
+                    break
             
-            return [point.payload for point, _ in [result]]
+            return payloads
             
         except Exception as e:
-            print(f"⚠️ Category fetch error: {e}")
+            logger.warning("Category fetch error: %s", e)
             return []
     
     def collection_info(self) -> Dict[str, Any]:
@@ -512,7 +780,8 @@ class MultimodalQdrantSearch:
     and the old text-only system with a unified CLIP-based approach.
     """
     
-    def __init__(self, collection_name: str = "products_multimodal"):
+    def __init__(self, collection_name: str = "products_multimodal",
+                 warmup: bool = True):
         self.collection_name = collection_name
         self._client = None
         self._is_available = False
@@ -521,6 +790,10 @@ class MultimodalQdrantSearch:
         
         if QDRANT_AVAILABLE:
             self._init_client()
+        
+        # Pay CLIP load + first-forward cost at startup, not on the first query
+        if warmup and self._is_available:
+            self.encode_text("warmup")
     
     def _init_client(self):
         """Initialize Qdrant client."""
@@ -532,10 +805,7 @@ class MultimodalQdrantSearch:
             return
         
         try:
-            self._client = QdrantClient(
-                url=qdrant_url,
-                api_key=qdrant_api_key
-            )
+            self._client = _create_client(qdrant_url, qdrant_api_key)
             # Check if multimodal collection exists
             collections = self._client.get_collections()
             existing = [c.name for c in collections.collections]
@@ -550,22 +820,16 @@ class MultimodalQdrantSearch:
             print(f"⚠️ Qdrant client init failed: {e}")
     
     def _load_clip(self):
-        """Lazy load CLIP model for text encoding."""
+        """Lazy load CLIP model for text encoding (shared with visual search)."""
         if self._clip_model is None:
-            try:
-                from transformers import CLIPProcessor, CLIPModel
-                import torch
-                
-                model_name = "openai/clip-vit-base-patch32"
-                self._clip_processor = CLIPProcessor.from_pretrained(model_name)
-                self._clip_model = CLIPModel.from_pretrained(model_name)
-                
-                device = "cuda" if torch.cuda.is_available() else "cpu"
-                self._clip_model = self._clip_model.to(device)
-                self._device = device
-                print(f"✅ CLIP loaded for text encoding ({device})")
-            except Exception as e:
-                print(f"⚠️ Failed to load CLIP: {e}")
+            from core.visual_search import _load_clip
+            
+            model, processor = _load_clip()
+            if model is None:
+                return
+            self._clip_model = model
+            self._clip_processor = processor
+            self._device = next(model.parameters()).device
     
     def encode_text(self, text: str) -> List[float]:
         """Encode text using CLIP (512-dim vector)."""
@@ -600,26 +864,7 @@ class MultimodalQdrantSearch:
     
     def enrich_results(self, results: List[SearchResult]) -> List[SearchResult]:
         """Enrich Qdrant results with full details from PostgreSQL."""
-        from db.products import get_products_by_ids
-        
-        if not results:
-            return []
-            
-        product_ids = [r.product_id for r in results]
-        db_products = {p['product_id']: p for p in get_products_by_ids(product_ids)}
-        
-        enriched = []
-        for r in results:
-            if r.product_id in db_products:
-                p = db_products[r.product_id]
-                r.description = p.get('description', r.description)
-                r.specs = p.get('details', {})
-                r.image_url = p.get('image_url', "")
-                r.features = p.get('features', r.features)
-                r.rating_count = p.get('rating_count', r.rating_count)
-            enriched.append(r)
-            
-        return enriched
+        return _enrich_results(results)
     
     def search(
         self,
@@ -720,35 +965,13 @@ class MultimodalQdrantSearch:
             return []
         
         try:
-            # Build filter
-            must_conditions = []
-            
-            if max_price is not None or min_price is not None:
-                range_params = {}
-                if max_price is not None:
-                    range_params["lte"] = max_price
-                if min_price is not None:
-                    range_params["gte"] = min_price
-                must_conditions.append(
-                    FieldCondition(key="price", range=Range(**range_params))
-                )
-            
-            if categories:
-                must_conditions.append(
-                    FieldCondition(key="category", match=MatchAny(any=categories))
-                )
-            
-            if in_stock_only:
-                must_conditions.append(
-                    FieldCondition(key="in_stock", match=MatchValue(value=True))
-                )
-            
-            if min_rating is not None:
-                must_conditions.append(
-                    FieldCondition(key="rating", range=Range(gte=min_rating))
-                )
-            
-            qdrant_filter = Filter(must=must_conditions) if must_conditions else None
+            qdrant_filter = _build_constraint_filter(
+                max_price=max_price,
+                min_price=min_price,
+                categories=categories,
+                in_stock_only=in_stock_only,
+                min_rating=min_rating
+            )
             
             # Search using named vector "image"
             results = self._client.search(
@@ -756,15 +979,13 @@ class MultimodalQdrantSearch:
                 query_vector=("image", image_vector),
                 query_filter=qdrant_filter,
                 limit=limit,
-                with_payload=True
+                with_payload=SEARCH_PAYLOAD
             )
             
             return [self._to_search_result(r) for r in results]
             
         except Exception as e:
-            print(f"⚠️ Image search error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.warning("Image search error: %s", e, exc_info=True)
             return []
     
     def search_by_text(
@@ -802,56 +1023,16 @@ class MultimodalQdrantSearch:
             return []
         
         try:
-            # Build filter
-            must_conditions = []
-            
-            # Price range filter
-            if max_price is not None or min_price is not None:
-                range_params = {}
-                if max_price is not None:
-                    range_params["lte"] = max_price
-                if min_price is not None:
-                    range_params["gte"] = min_price
-                must_conditions.append(
-                    FieldCondition(key="price", range=Range(**range_params))
-                )
-            
-            # Single category filter
-            if category:
-                must_conditions.append(
-                    FieldCondition(key="category", match=MatchValue(value=category))
-                )
-            
-            # Multiple categories (OR)
-            if categories and len(categories) > 0:
-                must_conditions.append(
-                    FieldCondition(key="category", match=MatchAny(any=categories))
-                )
-            
-            # Multiple brands (OR)
-            if brands and len(brands) > 0:
-                must_conditions.append(
-                    FieldCondition(key="brand", match=MatchAny(any=brands))
-                )
-            
-            if in_stock_only:
-                must_conditions.append(
-                    FieldCondition(key="in_stock", match=MatchValue(value=True))
-                )
-            
-            # Conditions filter
-            if conditions and len(conditions) > 0:
-                must_conditions.append(
-                    FieldCondition(key="condition", match=MatchAny(any=conditions))
-                )
-            
-            # Rating filter
-            if min_rating is not None:
-                must_conditions.append(
-                    FieldCondition(key="rating", range=Range(gte=min_rating))
-                )
-            
-            qdrant_filter = Filter(must=must_conditions) if must_conditions else None
+            qdrant_filter = _build_constraint_filter(
+                max_price=max_price,
+                min_price=min_price,
+                category=category,
+                categories=categories,
+                brands=brands,
+                in_stock_only=in_stock_only,
+                conditions=conditions,
+                min_rating=min_rating
+            )
             
             # Search using named vector "text"
             results = self._client.search(
@@ -859,13 +1040,13 @@ class MultimodalQdrantSearch:
                 query_vector=("text", text_vector),
                 query_filter=qdrant_filter,
                 limit=limit,
-                with_payload=True
+                with_payload=SEARCH_PAYLOAD
             )
             
             return [self._to_search_result(r) for r in results]
             
         except Exception as e:
-            print(f"⚠️ Text search error: {e}")
+            logger.warning("Text search error: %s", e)
             return []
     
     def hybrid_search(
@@ -931,6 +1112,10 @@ class MultimodalQdrantSearch:
                 limit=limit
             )
         
+        # Over-fetch for fusion: with k=60, ranks beyond ~limit+20 barely move
+        # the fused score, so fetching limit*2 per modality is wasted payload
+        oversample = max(limit, min(limit + 20, int(limit * 1.5)))
+        
         # Perform both searches
         image_results = self.search_by_image(
             image_vector=image_vector,
@@ -939,7 +1124,7 @@ class MultimodalQdrantSearch:
             categories=categories,
             in_stock_only=in_stock_only,
             min_rating=min_rating,
-            limit=limit*2
+            limit=oversample
         )
         text_results = self.search_by_text(
             text_vector=text_vector,
@@ -948,33 +1133,15 @@ class MultimodalQdrantSearch:
             categories=categories,
             in_stock_only=in_stock_only,
             min_rating=min_rating,
-            limit=limit*2
+            limit=oversample
         )
         
         # Fuse results using weighted reciprocal rank fusion
-        product_scores = {}
-        
-        for rank, r in enumerate(image_results):
-            pid = r.product_id
-            rrf_score = image_weight / (rank + 60)  # k=60 for RRF
-            product_scores[pid] = product_scores.get(pid, {'result': r, 'score': 0})
-            product_scores[pid]['score'] += rrf_score
-        
-        for rank, r in enumerate(text_results):
-            pid = r.product_id
-            rrf_score = text_weight / (rank + 60)
-            if pid not in product_scores:
-                product_scores[pid] = {'result': r, 'score': 0}
-            product_scores[pid]['score'] += rrf_score
-        
-        # Sort by fused score
-        sorted_results = sorted(
-            product_scores.values(),
-            key=lambda x: x['score'],
-            reverse=True
+        return _rrf_fuse(
+            [image_results, text_results],
+            [image_weight, text_weight],
+            limit
         )
-        
-        return [item['result'] for item in sorted_results[:limit]]
     
     def _to_search_result(self, hit) -> SearchResult:
         """Convert Qdrant hit to SearchResult."""
@@ -991,19 +1158,25 @@ class MultimodalQdrantSearch:
             condition=payload.get("condition", "new"),
             in_stock=payload.get("in_stock", True),
             features=payload.get("features", []),
-            description=payload.get("description", "")
+            image_url=payload.get("image_url", ""),
+            description=payload.get("description", ""),
+            specs=payload.get("details")
         )
 
 
 # Singleton for multimodal search
 _multimodal_search = None
+_multimodal_search_lock = threading.Lock()
 
 
 def get_multimodal_search() -> MultimodalQdrantSearch:
-    """Get singleton multimodal search instance."""
+    """Get singleton multimodal search instance (thread-safe)."""
     global _multimodal_search
     if _multimodal_search is None:
-        _multimodal_search = MultimodalQdrantSearch()
+        with _multimodal_search_lock:
+            # Re-check: another thread may have built it while we waited
+            if _multimodal_search is None:
+                _multimodal_search = MultimodalQdrantSearch()
     return _multimodal_search
 
 
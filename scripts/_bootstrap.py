@@ -0,0 +1,27 @@
+"""
+Shared event-loop setup for the async scripts
+Runs coroutines on uvloop (libuv) when it is installed
+"""
+import asyncio
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+
+def run(main):
+    """
+    asyncio.run(), on a uvloop event loop when available.
+    
+    Args:
+        main: Coroutine to run to completion
+    
+    Returns:
+        The coroutine's result
+    """
+    if UVLOOP_AVAILABLE:
+        # uvloop.run (uvloop >= 0.18) also works before asyncio.Runner (3.11)
+        return uvloop.run(main)
+    return asyncio.run(main)
@@ -0,0 +1,91 @@
+"""
+pytest hooks for the smoke-test scripts
+
+The scripts double as pytest modules, so independent tests can run across
+CPU cores with pytest-xdist:
+
+    pytest -n auto scripts/
+
+Coroutine tests run on their own event loop (uvloop when installed, no
+pytest-asyncio needed). Tests marked `api` are skipped when the API server
+isn't running, and tests marked `groq` when GROQ_API_KEY isn't set. The
+`engine` fixture builds one FinBundleEngine per worker process and shares
+it across every test that takes it. stress_test.py's checks only log their
+failures, so a stress test fails when it adds to RESULTS['failed'].
+"""
+import inspect
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts._bootstrap import run
+
+API_URL = "http://localhost:8123"
+
+# CLI tools whose test_* helpers take arguments, not fixtures
+collect_ignore = ["quick_test.py"]
+
+
+@lru_cache(maxsize=1)
+def server_up() -> bool:
+    """Whether the API answers its health check (checked once per worker)."""
+    import httpx
+
+    try:
+        return httpx.get(f"{API_URL}/api/health", timeout=1).status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """FinBundleEngine shared by the whole session (models load once)."""
+    from core.search_engine import FinBundleEngine
+    return FinBundleEngine()
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", f"api: needs the API server on {API_URL}")
+    config.addinivalue_line("markers", "groq: needs GROQ_API_KEY")
+
+
+def pytest_collection_modifyitems(config, items):
+    api_items = [item for item in items if item.get_closest_marker("api")]
+    if api_items and not server_up():
+        skip = pytest.mark.skip(reason=f"API server not running on {API_URL}")
+        for item in api_items:
+            item.add_marker(skip)
+    
+    if not os.getenv("GROQ_API_KEY"):
+        skip = pytest.mark.skip(reason="GROQ_API_KEY not set")
+        for item in items:
+            if item.get_closest_marker("groq"):
+                item.add_marker(skip)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """
+    Run a test, taking over from pytest's default call.
+    
+    `async def` tests run to completion on a fresh event loop. A stress
+    test that logged failures (instead of raising) is failed here.
+    """
+    results = getattr(pyfuncitem.module, "RESULTS", None)
+    before = len(results["failed"]) if results is not None else 0
+    
+    kwargs = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    outcome = pyfuncitem.obj(**kwargs)
+    if inspect.iscoroutine(outcome):
+        run(outcome)
+    
+    if results is not None and len(results["failed"]) > before:
+        failed = results["failed"][before:]
+        pytest.fail("\n".join(f"{r.test}: {r.error}" for r in failed), pytrace=False)
+    return True
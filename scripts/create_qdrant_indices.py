@@ -12,7 +12,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import PayloadSchemaType
+from qdrant_client.models import (
+    PayloadSchemaType, ScalarQuantization, ScalarQuantizationConfig, ScalarType
+)
 
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", None)
@@ -68,6 +70,24 @@ def create_indices():
             else:
                 print(f"  ⚠️  Failed to create {field_name}: {e}")
     
+    # Int8 scalar quantization keeps a 4x smaller copy of the vectors in RAM;
+    # Qdrant rescores candidates against the original vectors at query time
+    print("\n🗜️  Enabling int8 scalar quantization...")
+    try:
+        client.update_collection(
+            collection_name=COLLECTION_NAME,
+            quantization_config=ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True
+                )
+            )
+        )
+        print("  ✅ Scalar quantization enabled (int8)")
+    except Exception as e:
+        print(f"  ⚠️  Failed to enable quantization: {e}")
+    
     # Verify indices
     print("\n🔍 Verifying indices...")
     collection_info = client.get_collection(COLLECTION_NAME)
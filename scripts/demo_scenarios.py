@@ -79,8 +79,8 @@ DEMO_SCENARIOS = [
 ]
 
 
-async def run_scenario(scenario: dict, engine=None):
-    """Run a single demo scenario."""
+def print_scenario_header(scenario: dict):
+    """Print the scenario banner and inputs."""
     print("\n" + "=" * 60)
     print(f"📍 {scenario['name']}")
     print("=" * 60)
@@ -89,18 +89,10 @@ async def run_scenario(scenario: dict, engine=None):
     print(f"Budget: ${scenario['budget']}")
     print(f"Expected Path: {scenario['expected_path'].upper()}")
     print("-" * 60)
-    
-    if engine is None:
-        print("⚠️ No engine provided, skipping execution")
-        return None
-    
-    # Execute search
-    result = await engine.search(
-        query=scenario['query'],
-        user_id=scenario['user_id'],
-        budget=scenario['budget']
-    )
-    
+
+
+def print_scenario_result(scenario: dict, result: dict):
+    """Print the search outcome and talking points for a scenario."""
     metrics = result.get('metrics', {})
     path = metrics.get('path_used', 'unknown')
     latency = metrics.get('total_latency_ms', 0)
@@ -145,6 +137,28 @@ async def run_scenario(scenario: dict, engine=None):
     print(f"\n📢 Talking Points:")
     for point in scenario['talking_points']:
         print(f"   • {point}")
+
+
+async def _search_scenario(scenario: dict, engine) -> dict:
+    """Execute the search for a scenario."""
+    return await engine.search(
+        query=scenario['query'],
+        user_id=scenario['user_id'],
+        budget=scenario['budget']
+    )
+
+
+async def run_scenario(scenario: dict, engine=None):
+    """Run a single demo scenario."""
+    print_scenario_header(scenario)
+    
+    if engine is None:
+        print("⚠️ No engine provided, skipping execution")
+        return None
+    
+    # Execute search
+    result = await _search_scenario(scenario, engine)
+    print_scenario_result(scenario, result)
     
     return result
 
@@ -165,23 +179,37 @@ async def run_all_demos():
         print(f"⚠️ Could not load engine: {e}")
         print("   Running in dry-run mode (no actual searches)")
     
-    # Run scenarios
+    # Scenarios are independent searches, so run them concurrently and
+    # print the reports afterwards in scenario order
+    if engine is not None:
+        outcomes = await asyncio.gather(
+            *(_search_scenario(s, engine) for s in DEMO_SCENARIOS),
+            return_exceptions=True
+        )
+    else:
+        outcomes = [None] * len(DEMO_SCENARIOS)
+    
     results = []
-    for scenario in DEMO_SCENARIOS:
-        try:
-            result = await run_scenario(scenario, engine)
-            results.append({
-                'name': scenario['name'],
-                'success': result is not None,
-                'path_matched': result and result.get('metrics', {}).get('path_used') == scenario['expected_path']
-            })
-        except Exception as e:
-            print(f"\n❌ Scenario failed: {e}")
+    for scenario, outcome in zip(DEMO_SCENARIOS, outcomes):
+        print_scenario_header(scenario)
+        if isinstance(outcome, Exception):
+            print(f"\n❌ Scenario failed: {outcome}")
             results.append({
                 'name': scenario['name'],
                 'success': False,
-                'error': str(e)
+                'error': str(outcome)
             })
+            continue
+        
+        if outcome is None:
+            print("⚠️ No engine provided, skipping execution")
+        else:
+            print_scenario_result(scenario, outcome)
+        results.append({
+            'name': scenario['name'],
+            'success': outcome is not None,
+            'path_matched': outcome and outcome.get('metrics', {}).get('path_used') == scenario['expected_path']
+        })
     
     # Summary
     print("\n" + "=" * 60)
@@ -1,6 +1,6 @@
 import re
 import os
-import subprocess
+import asyncio
 
 # Define input and output
 markdown_file = r"C:\Users\MSI\.gemini\antigravity\brain\af2a4dde-3f62-4721-90f3-1db938f0f205\architecture_diagrams.md"
@@ -20,7 +20,8 @@ matches = re.findall(pattern, content, re.DOTALL)
 print(f"Found {len(matches)} diagrams.")
 print(f"Generating images in: {output_dir}")
 
-for i, (title, mermaid_code) in enumerate(matches, 1):
+
+async def render_one(i, title, mermaid_code, semaphore):
     # Clean title for filename
     safe_title = re.sub(r'[\\/*?:"<>|]', "", title).replace(" ", "_").strip()
     filename = f"{i}_{safe_title}.png"
@@ -31,17 +32,32 @@ for i, (title, mermaid_code) in enumerate(matches, 1):
     with open(temp_mmd, "w", encoding="utf-8") as f:
         f.write(mermaid_code.strip())
     
-    # Run mmdc command
+    # Run mmdc command (through the shell so mmdc.cmd resolves on Windows)
     cmd = f'mmdc -i "{temp_mmd}" -o "{output_png}" -t dark -b transparent'
     try:
-        print(f"Generating {filename}...")
-        subprocess.run(cmd, shell=True, check=True)
-        print(f"✅ Generated: {filename}")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Failed to generate {filename}: {e}")
+        async with semaphore:
+            print(f"Generating {filename}...")
+            proc = await asyncio.create_subprocess_shell(cmd)
+            returncode = await proc.wait()
+        if returncode == 0:
+            print(f"✅ Generated: {filename}")
+        else:
+            print(f"❌ Failed to generate {filename}: exit status {returncode}")
     finally:
         # Cleanup temp file
         if os.path.exists(temp_mmd):
             os.remove(temp_mmd)
 
+
+async def render_all():
+    # Each mmdc run pays Node/Chromium startup; run one per core concurrently
+    semaphore = asyncio.Semaphore(os.cpu_count() or 4)
+    await asyncio.gather(*(
+        render_one(i, title, mermaid_code, semaphore)
+        for i, (title, mermaid_code) in enumerate(matches, 1)
+    ))
+
+
+asyncio.run(render_all())
+
 print("\n🎉 All diagrams generated successfully!")
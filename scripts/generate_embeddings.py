@@ -3,19 +3,25 @@ Generate Text Embeddings for Products
 Uses sentence-transformers all-MiniLM-L6-v2 model (384 dimensions)
 """
 import json
+import sys
 import numpy as np
 from pathlib import Path
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.embeddings import OnnxEmbeddingModel
+
 
 def create_product_text(product: dict) -> str:
     """Create rich text representation for embedding."""
-    features = ' '.join(product.get('features', []))
+    f = product.get('features')
+    features = ' '.join(f) if f else ''
     return f"{product['name']} {product['category']} {product['brand']} {product['description']} {features}"
 
 
-def generate_embeddings():
+def generate_embeddings(backend: str = 'torch'):
     """Generate embeddings for all products."""
     data_dir = Path(__file__).parent.parent / 'data'
     products_path = data_dir / 'products.json'
@@ -30,31 +36,59 @@ def generate_embeddings():
     print(f"📂 Loaded {len(products)} products")
     print("🔄 Loading sentence-transformers model (all-MiniLM-L6-v2)...")
     
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    batch_size = 32
+    if backend == 'onnx':
+        model = OnnxEmbeddingModel()
+        batch_size = 128
+        print("⚡ Using ONNX Runtime (INT8)")
+    else:
+        model = SentenceTransformer('all-MiniLM-L6-v2')
+    if backend != 'onnx' and model.device.type == 'cuda':
+        # FP16 on GPU: tensor-core matmuls and half the activation bandwidth
+        model = model.half()
+        batch_size = 512
+        print("⚡ Using GPU (FP16)")
     
     print("🔄 Generating embeddings...")
     texts = [create_product_text(p) for p in products]
     
-    # Generate embeddings in batches with progress bar
-    embeddings = model.encode(
-        texts,
-        batch_size=32,
-        show_progress_bar=True,
-        convert_to_numpy=True
-    )
-    
-    # Save embeddings
+    # Encode in chunks of several batches with one progress update per chunk,
+    # writing each chunk straight into a memory-mapped float16 .npy so the
+    # full matrix never has to sit in RAM
     output_path = data_dir / 'text_embeddings.npy'
-    np.save(output_path, embeddings)
+    chunk_size = batch_size * 8
+    dim = model.get_sentence_embedding_dimension()
+    embeddings = np.lib.format.open_memmap(
+        output_path, mode='w+', dtype=np.float16, shape=(len(texts), dim)
+    )
+    # Chunks are cut from length-sorted texts so every padded batch holds
+    # similar-length inputs; rows are written back at their original index
+    order = np.argsort([len(t) for t in texts], kind='stable')
+    for start in tqdm(range(0, len(texts), chunk_size), desc="Embedding", unit="chunk"):
+        idx = order[start:start + chunk_size]
+        embeddings[idx] = model.encode(
+            [texts[i] for i in idx],
+            batch_size=batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+    embeddings.flush()
     
     print(f"\n✅ Generated {len(embeddings)} embeddings")
     print(f"📐 Embedding shape: {embeddings.shape}")
     print(f"📁 Saved to: {output_path}")
     
     # Verify
-    loaded = np.load(output_path)
+    loaded = np.load(output_path, mmap_mode='r')
     print(f"✓ Verification: Loaded shape = {loaded.shape}")
 
 
 if __name__ == "__main__":
-    generate_embeddings()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generate product text embeddings")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch",
+                        help="torch = SentenceTransformer, onnx = INT8 ONNX Runtime")
+    args = parser.parse_args()
+    
+    generate_embeddings(backend=args.backend)
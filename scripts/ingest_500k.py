@@ -6,16 +6,25 @@ Usage:
     python scripts/ingest_500k.py --jsonl data/electronic_products.jsonl --limit 500000
     python scripts/ingest_500k.py --jsonl data/electronic_products.jsonl --limit 500000 --resume
 """
+import io
 import json
 import argparse
 import time
 import os
 import gc
+import hashlib
+import sqlite3
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional, Generator
+from typing import List, Dict, Optional, Generator, Iterable, Tuple
 import numpy as np
 from tqdm import tqdm
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
+import orjson
 
 # Add parent to path
 import sys
@@ -76,6 +85,75 @@ CATEGORY_NORMALIZATION = {
 }
 
 
+# Name-keyword rules in priority order: (category, keywords, excluded,
+# refinement). A rule fires when any keyword occurs in the product name and
+# no excluded word does; a refinement (keywords, category) overrides the
+# result when one of its keywords is also present.
+CATEGORY_KEYWORD_RULES = [
+    ('monitors', ('monitor',), ('baby',), None),
+    ('laptops', ('laptop', 'notebook'), (), None),
+    ('keyboards', ('keyboard',), (),
+     (('piano', 'midi', 'musical', 'synth'), 'musical_instruments')),
+    ('mice', ('mouse', 'mice'), (), None),
+    ('headphones', ('headphone', 'headset', 'earbuds'), (), None),
+    ('speakers', ('speaker',), (), None),
+    ('phones', ('phone',), ('headphone',),
+     (('case', 'charger'), 'phone_accessories')),
+    ('tablets', ('tablet', 'ipad'), (), None),
+    ('cameras', ('camera',), (), None),
+    ('tvs', ('tv', 'television'), (), None),
+    ('networking', ('router', 'modem'), (), None),
+    ('printers', ('printer',), (), None),
+    ('storage', ('ssd', 'hard drive', 'hdd'), (), None),
+    ('memory', ('ram', 'memory'), (), None),
+    ('graphics_cards', ('gpu', 'graphics card'), (), None),
+    ('processors', ('cpu', 'processor'), (), None),
+    ('cables_adapters', ('cable', 'adapter'), (), None),
+]
+
+_RULE_KEYWORDS = frozenset(
+    kw
+    for _, keywords, excluded, refine in CATEGORY_KEYWORD_RULES
+    for kw in keywords + excluded + (refine[0] if refine else ())
+)
+
+# One Aho-Corasick pass finds every rule keyword in the name at once,
+# instead of a substring scan per keyword
+try:
+    import ahocorasick
+    _keyword_automaton = ahocorasick.Automaton()
+    for _kw in _RULE_KEYWORDS:
+        _keyword_automaton.add_word(_kw, _kw)
+    _keyword_automaton.make_automaton()
+except ImportError:
+    _keyword_automaton = None
+
+
+def _name_keywords(name_lower: str) -> set:
+    """Return the set of rule keywords occurring in a lowered product name."""
+    if _keyword_automaton is None:
+        return {kw for kw in _RULE_KEYWORDS if kw in name_lower}
+    return {kw for _, kw in _keyword_automaton.iter(name_lower)}
+
+
+@lru_cache(maxsize=1024)
+def _normalize_cat_only(category: str) -> Tuple[Optional[str], str]:
+    """
+    Category-only part of normalization, cached per raw category string.
+    
+    Amazon dumps use only a few dozen distinct main_category values, so the
+    lowercasing, direct lookup and fallback slug are computed once each.
+    
+    Returns:
+        (direct mapping or None, fallback slug)
+    """
+    cat_lower = category.lower().strip()
+    return (
+        CATEGORY_NORMALIZATION.get(cat_lower),
+        cat_lower.replace(' & ', '_').replace(' ', '_')
+    )
+
+
 def normalize_category(category: str, product_name: str = "") -> str:
     """
     Normalize category with fallback to keyword detection.
@@ -87,63 +165,53 @@ def normalize_category(category: str, product_name: str = "") -> str:
     Returns:
         Normalized category string
     """
-    cat_lower = category.lower().strip()
+    direct, fallback = _normalize_cat_only(category)
     
     # Direct mapping
-    if cat_lower in CATEGORY_NORMALIZATION:
-        return CATEGORY_NORMALIZATION[cat_lower]
+    if direct is not None:
+        return direct
     
     # Keyword-based inference for generic categories
-    name_lower = product_name.lower()
-    
-    if 'monitor' in name_lower and 'baby' not in name_lower:
-        return 'monitors'
-    if 'laptop' in name_lower or 'notebook' in name_lower:
-        return 'laptops'
-    if 'keyboard' in name_lower:
-        if any(kw in name_lower for kw in ['piano', 'midi', 'musical', 'synth']):
-            return 'musical_instruments'
-        return 'keyboards'
-    if 'mouse' in name_lower or 'mice' in name_lower:
-        return 'mice'
-    if 'headphone' in name_lower or 'headset' in name_lower or 'earbuds' in name_lower:
-        return 'headphones'
-    if 'speaker' in name_lower:
-        return 'speakers'
-    if 'phone' in name_lower and 'headphone' not in name_lower:
-        if 'case' in name_lower or 'charger' in name_lower:
-            return 'phone_accessories'
-        return 'phones'
-    if 'tablet' in name_lower or 'ipad' in name_lower:
-        return 'tablets'
-    if 'camera' in name_lower:
-        return 'cameras'
-    if 'tv' in name_lower or 'television' in name_lower:
-        return 'tvs'
-    if 'router' in name_lower or 'modem' in name_lower:
-        return 'networking'
-    if 'printer' in name_lower:
-        return 'printers'
-    if 'ssd' in name_lower or 'hard drive' in name_lower or 'hdd' in name_lower:
-        return 'storage'
-    if 'ram' in name_lower or 'memory' in name_lower:
-        return 'memory'
-    if 'gpu' in name_lower or 'graphics card' in name_lower:
-        return 'graphics_cards'
-    if 'cpu' in name_lower or 'processor' in name_lower:
-        return 'processors'
-    if 'cable' in name_lower or 'adapter' in name_lower:
-        return 'cables_adapters'
+    hits = _name_keywords(product_name.lower())
+    if hits:
+        for target, keywords, excluded, refine in CATEGORY_KEYWORD_RULES:
+            if hits.isdisjoint(keywords) or not hits.isdisjoint(excluded):
+                continue
+            if refine and not hits.isdisjoint(refine[0]):
+                return refine[1]
+            return target
     
     # Keep original if no match
-    return cat_lower.replace(' & ', '_').replace(' ', '_')
+    return fallback
+
+
+def _to_float(value, default: Optional[float] = 0.0) -> Optional[float]:
+    """Coerce a JSON scalar to float, returning default for missing/invalid values."""
+    if value is None or value == '' or value == 'None' or isinstance(value, bool):
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return default
+    return default
+
+
+def _to_int(value, default: int = 0) -> int:
+    """Coerce a JSON scalar to int, returning default for missing/invalid values."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    number = _to_float(value, None)
+    return int(number) if number is not None and number == number else default
 
 
 # ============================================================
 # PRODUCT DATACLASS
 # ============================================================
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     """Product model for ingestion."""
     product_id: str
@@ -160,99 +228,188 @@ class Product:
     details: Dict
     in_stock: bool = True
     condition: str = "new"
+    # JSON columns serialized once at construction (in the parser workers)
+    # so retries and resumed batches don't re-dump them
+    features_json: str = field(init=False, repr=False, compare=False)
+    details_json: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.features_json = orjson.dumps(self.features).decode()
+        self.details_json = orjson.dumps(self.details).decode()
     
     @classmethod
     def from_amazon_json(cls, data: Dict) -> Optional['Product']:
-        """Convert Amazon JSON to Product."""
-        try:
-            # Extract price
-            price = data.get('price')
-            if price is None or price == '' or price == 'None':
-                return None
-            price = float(price) if isinstance(price, (int, float, str)) else 0
-            if price < 1.0 or price > 50000:
-                return None
-            
-            # Extract title
-            title = data.get('title', '')
-            if not title or len(title) < 5:
-                return None
-            
-            # Extract category
-            main_category = data.get('main_category', 'Unknown')
-            normalized_category = normalize_category(main_category, title)
-            
-            # Extract brand
-            brand = data.get('store', '')
-            if not brand:
-                details = data.get('details', {})
-                brand = details.get('Brand', details.get('Manufacturer', 'Generic'))
-            
-            # Extract rating
-            rating = data.get('average_rating', 0)
-            if rating is None:
-                rating = 0
-            rating = float(rating) if rating else 0
-            
-            rating_count = data.get('rating_number', 0)
-            if rating_count is None:
-                rating_count = 0
-            rating_count = int(rating_count) if rating_count else 0
-            
-            # Extract description
-            description = ''
-            desc_list = data.get('description', [])
-            if isinstance(desc_list, list) and desc_list:
-                description = desc_list[0][:500] if desc_list[0] else ''
-            elif isinstance(desc_list, str):
-                description = desc_list[:500]
-            
-            # Extract features
-            features = data.get('features', [])
-            if not isinstance(features, list):
-                features = []
-            features = features[:10]  # Limit features
-            
-            # Extract image
-            images = data.get('images', [])
-            image_url = ''
-            if images and isinstance(images, list) and len(images) > 0:
-                first_img = images[0]
-                if isinstance(first_img, dict):
-                    image_url = first_img.get('large', first_img.get('thumb', ''))
-                elif isinstance(first_img, str):
-                    image_url = first_img
-            
-            # Extract details
-            details = data.get('details', {})
-            if not isinstance(details, dict):
-                details = {}
-            
-            return cls(
-                product_id=data.get('parent_asin', ''),
-                title=title,
-                main_category=main_category,
-                normalized_category=normalized_category,
-                brand=brand or 'Generic',
-                price=price,
-                rating=rating,
-                rating_count=rating_count,
-                description=description,
-                features=features,
-                image_url=image_url,
-                details=details
-            )
-            
-        except Exception as e:
+        """Convert Amazon JSON to Product (None if the record is unusable)."""
+        # Validated field by field so malformed rows are rejected without
+        # raising; messy dumps reject a large share of rows
+        
+        # Extract ID (rows without one would all collapse into one product)
+        product_id = data.get('parent_asin')
+        if product_id is None or not str(product_id).strip():
+            return None
+        
+        # Extract price
+        price = _to_float(data.get('price'), None)
+        if price is None or not 1.0 <= price <= 50000:
             return None
+        
+        # Extract title
+        title = data.get('title')
+        if not isinstance(title, str) or len(title) < 5:
+            return None
+        
+        # Extract category
+        main_category = data.get('main_category')
+        if not isinstance(main_category, str) or not main_category:
+            main_category = 'Unknown'
+        normalized_category = normalize_category(main_category, title)
+        
+        # Extract details
+        details = data.get('details')
+        if not isinstance(details, dict):
+            details = {}
+        
+        # Extract brand
+        brand = data.get('store') or details.get('Brand', details.get('Manufacturer', 'Generic'))
+        if not isinstance(brand, str):
+            brand = str(brand)  # Binary COPY sends brand as varchar
+        
+        # Extract rating
+        rating = _to_float(data.get('average_rating'), 0.0)
+        rating_count = _to_int(data.get('rating_number'), 0)
+        
+        # Extract description
+        description = ''
+        desc_list = data.get('description')
+        if isinstance(desc_list, list) and desc_list and isinstance(desc_list[0], str):
+            description = desc_list[0][:500]
+        elif isinstance(desc_list, str):
+            description = desc_list[:500]
+        
+        # Extract features
+        features = data.get('features')
+        if isinstance(features, list):
+            features = [f for f in features[:10] if isinstance(f, str)]  # Limit features
+        else:
+            features = []
+        
+        # Extract image
+        image_url = ''
+        images = data.get('images')
+        if isinstance(images, list) and images:
+            first_img = images[0]
+            if isinstance(first_img, dict):
+                image_url = first_img.get('large', first_img.get('thumb', '')) or ''
+            elif isinstance(first_img, str):
+                image_url = first_img
+        
+        return cls(
+            product_id=str(product_id),
+            title=title,
+            main_category=main_category,
+            normalized_category=normalized_category,
+            brand=brand or 'Generic',
+            price=price,
+            rating=rating,
+            rating_count=rating_count,
+            description=description,
+            features=features,
+            image_url=image_url,
+            details=details
+        )
 
 
 # ============================================================
 # STREAMING PARSER
 # ============================================================
 
+PARSE_CHUNK_LINES = 10000
+
+
+def _parse_chunk(lines: List[bytes]) -> List[Product]:
+    """Decode and validate a chunk of JSONL lines (runs in a worker process)."""
+    products = []
+    for line in lines:
+        try:
+            product = Product.from_amazon_json(orjson.loads(line))
+        except orjson.JSONDecodeError:
+            continue
+        if product:
+            products.append(product)
+    return products
+
+
+def _read_chunks(f, chunk_lines: int = PARSE_CHUNK_LINES) -> Generator[Tuple[int, List[bytes]], None, None]:
+    """Group raw lines from a binary file into chunks, with each chunk's byte offset."""
+    offset = f.tell()
+    chunk_offset = offset
+    chunk = []
+    for line in f:
+        offset += len(line)
+        if not line.strip():
+            continue
+        chunk.append(line)
+        if len(chunk) >= chunk_lines:
+            yield chunk_offset, chunk
+            chunk = []
+            chunk_offset = offset
+    if chunk:
+        yield chunk_offset, chunk
+
+
+def _parse_json_array(f, chunk_size: int = PARSE_CHUNK_LINES) -> Generator[Tuple[Optional[int], List[Product]], None, None]:
+    """Incrementally parse a top-level JSON array of records with ijson."""
+    import ijson
+    chunk = []
+    for data in ijson.items(f, 'item', use_float=True):
+        product = Product.from_amazon_json(data)
+        if product:
+            chunk.append(product)
+            if len(chunk) >= chunk_size:
+                yield None, chunk
+                chunk = []
+    if chunk:
+        yield None, chunk
+
+
+def _parsed_chunks(f, workers: int) -> Generator[Tuple[Optional[int], List[Product]], None, None]:
+    """
+    Yield (byte offset, parsed products) per chunk in file order.
+    
+    The offset is where the chunk's first line starts, or None when the input
+    is not line-delimited
+    """
+    # A plain JSON array export cannot be split on lines; stream it instead
+    if f.peek(64).lstrip()[:1] == b'[':
+        yield from _parse_json_array(f)
+        return
+    
+    if workers <= 1:
+        for offset, lines in _read_chunks(f):
+            yield offset, _parse_chunk(lines)
+        return
+    
+    # Keep a bounded window of chunks in flight so the reader never runs
+    # far ahead of the consumer
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for offset, lines in _read_chunks(f):
+                pending.append((offset, executor.submit(_parse_chunk, lines)))
+                if len(pending) >= workers * 2:
+                    offset, future = pending.popleft()
+                    yield offset, future.result()
+            while pending:
+                offset, future = pending.popleft()
+                yield offset, future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
 def stream_products(filepath: Path, limit: Optional[int] = None, 
-                    skip: int = 0) -> Generator[Product, None, None]:
+                    skip: int = 0, workers: int = 1, start_offset: int = 0,
+                    with_positions: bool = False) -> Generator:
     """
     Stream products from JSONL file (memory efficient).
     
@@ -260,34 +417,42 @@ def stream_products(filepath: Path, limit: Optional[int] = None,
         filepath: Path to JSONL file
         limit: Max products to yield
         skip: Number of products to skip (for resume)
+        workers: Parser processes (1 = parse inline)
+        start_offset: Byte offset to seek to before reading (for resume)
+        with_positions: Also yield each product's resume position
         
     Yields:
-        Product objects
+        Product objects, or (product, (offset, skip)) pairs with positions;
+        resuming with start_offset=offset, skip=skip continues right after
+        that product
     """
     count = 0
     yielded = 0
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line in f:
-            if limit and yielded >= limit:
-                break
-            
-            try:
-                data = json.loads(line.strip())
-                product = Product.from_amazon_json(data)
+    # Binary mode with a 1 MiB buffer: orjson parses the raw bytes directly,
+    # so there is no text decoding or strip() copy per line
+    with io.BufferedReader(open(filepath, 'rb', buffering=0), buffer_size=1 << 20) as f:
+        if start_offset:
+            f.seek(start_offset)
+        
+        for offset, chunk in _parsed_chunks(f, workers):
+            for index, product in enumerate(chunk, 1):
+                if limit is not None and yielded >= limit:
+                    return
                 
-                if product:
-                    count += 1
-                    if count > skip:
-                        yielded += 1
+                count += 1
+                if count > skip:
+                    yielded += 1
+                    if not with_positions:
                         yield product
-                        
-            except json.JSONDecodeError:
-                continue
+                    elif offset is None:
+                        yield product, (0, count)
+                    else:
+                        yield product, (offset, index)
 
 
 def count_lines(filepath: Path) -> int:
-    """Count lines in file efficiently."""
+    """Count lines in file exactly (reads the whole file)."""
     count = 0
     with open(filepath, 'rb') as f:
         for _ in f:
@@ -295,21 +460,56 @@ def count_lines(filepath: Path) -> int:
     return count
 
 
+def estimate_lines(filepath: Path, sample: int = 1000) -> int:
+    """
+    Estimate line count from file size and the average length of the first lines.
+    
+    Avoids a full pass over multi-GB files just to size the progress bar.
+    """
+    sampled_bytes = 0
+    sampled_lines = 0
+    with open(filepath, 'rb') as f:
+        for line in f:
+            sampled_bytes += len(line)
+            sampled_lines += 1
+            if sampled_lines >= sample:
+                break
+    if not sampled_lines:
+        return 0
+    return int(os.stat(filepath).st_size / (sampled_bytes / sampled_lines))
+
+
 # ============================================================
 # EMBEDDING GENERATION
 # ============================================================
 
 def create_embedding_text(product: Product) -> str:
     """Create rich text representation for embedding."""
-    features = ' '.join(product.features[:5])
+    f = product.features
+    features = ' '.join(f[:5]) if f else ''
     return f"{product.title} {product.normalized_category} {product.brand} {product.description[:300]} {features}"
 
 
-def generate_embeddings_batch(texts: List[str], model) -> np.ndarray:
+def create_embedding_texts(products: List[Product]) -> List[str]:
+    """
+    Batch form of create_embedding_text (identical output).
+    
+    Fields are gathered column by column and joined with map/str.join,
+    which avoids the per-row f-string and attribute lookups.
+    """
+    titles = [p.title for p in products]
+    cats = [p.normalized_category for p in products]
+    brands = [p.brand for p in products]
+    descs = [p.description[:300] for p in products]
+    feats = [' '.join(p.features[:5]) if p.features else '' for p in products]
+    return list(map(' '.join, zip(titles, cats, brands, descs, feats)))
+
+
+def generate_embeddings_batch(texts: List[str], model, batch_size: int = 512) -> np.ndarray:
     """Generate embeddings for a batch of texts."""
     embeddings = model.encode(
         texts,
-        batch_size=128,  # Larger batch for GPU
+        batch_size=batch_size,  # Large batches keep the GPU saturated in FP16
         show_progress_bar=False,
         convert_to_numpy=True,
         normalize_embeddings=True  # L2 normalize for cosine similarity
@@ -317,50 +517,228 @@ def generate_embeddings_batch(texts: List[str], model) -> np.ndarray:
     return embeddings
 
 
+class EmbeddingCache:
+    """
+    Disk-backed memo of embedding text -> vector, keyed by a content hash.
+    
+    Re-runs and resumed ingests (and duplicate SKU texts within a run) reuse
+    stored vectors instead of re-encoding them. Vectors are stored as FP16.
+    The hash is keyed on the embedding model (backend, model id, precision),
+    so vectors from different models never mix in one collection.
+    """
+    
+    # Stay under SQLite's default bound-parameter limit
+    LOOKUP_CHUNK = 900
+    
+    def __init__(self, path: Path, model_id: str):
+        self._hash_key = model_id.encode('utf-8')[:64]  # blake2b key limit
+        self.conn = sqlite3.connect(str(path))
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+    
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16, key=self._hash_key).digest()
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Fetch stored vectors for the given keys (missing keys are omitted)."""
+        found = {}
+        for i in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[i:i + self.LOOKUP_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float16)
+        return found
+    
+    def put_many(self, keys: List[bytes], vectors: np.ndarray):
+        """Store vectors for the given keys."""
+        vectors = np.asarray(vectors, dtype=np.float16)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                ((k, v.tobytes()) for k, v in zip(keys, vectors))
+            )
+    
+    def close(self):
+        self.conn.close()
+
+
+def generate_embeddings_cached(texts: List[str], model,
+                               cache: Optional[EmbeddingCache]) -> np.ndarray:
+    """Generate embeddings, encoding only texts missing from the cache."""
+    if cache is None:
+        return generate_embeddings_batch(texts, model)
+    
+    keys = [cache.key(t) for t in texts]
+    found = cache.get_many(keys)
+    
+    # Encode each missing text once, even if it repeats within the batch
+    missing = {}
+    for i, key in enumerate(keys):
+        if key not in found and key not in missing:
+            missing[key] = i
+    if missing:
+        miss_keys = list(missing)
+        encoded = generate_embeddings_batch([texts[missing[k]] for k in miss_keys], model)
+        cache.put_many(miss_keys, encoded)
+        found.update(zip(miss_keys, encoded))
+    
+    return np.stack([found[k] for k in keys]).astype(np.float32, copy=False)
+
+
+def prefetch_batches(products: Iterable[Tuple[Product, Tuple[int, int]]], batch_size: int,
+                     depth: int = 2) -> Generator[Tuple[List[Product], List[str], Tuple[int, int], bool], None, None]:
+    """
+    Group products into batches with their embedding texts on a background thread.
+    
+    model.encode releases the GIL while the GPU works, so the producer parses
+    batch N+1 while batch N is being embedded. The bounded queue keeps at most
+    `depth` batches buffered.
+    
+    Args:
+        products: (product, resume position) pairs from stream_products
+        
+    Yields:
+        (products, embedding texts, resume position after the batch, whether
+        it is the last batch) per batch
+    """
+    buffer = queue.Queue(maxsize=depth)
+    
+    def produce():
+        try:
+            batch = []
+            position = None
+            for product, position in products:
+                batch.append(product)
+                if len(batch) >= batch_size:
+                    buffer.put((batch, create_embedding_texts(batch), position))
+                    batch = []
+            if batch:
+                buffer.put((batch, create_embedding_texts(batch), position))
+            buffer.put(None)
+        except BaseException as e:
+            buffer.put(e)
+    
+    threading.Thread(target=produce, name="ingest-prefetch", daemon=True).start()
+    
+    # Look one batch ahead so the last batch can be flagged
+    item = buffer.get()
+    while True:
+        if item is None:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        next_item = buffer.get()
+        yield item + (next_item is None,)
+        item = next_item
+
+
 # ============================================================
 # POSTGRESQL OPERATIONS
 # ============================================================
 
-def insert_products_batch(products: List[Product], cursor) -> int:
-    """Insert batch of products to PostgreSQL."""
-    if not products:
-        return 0
+PRODUCT_COLUMNS = (
+    'product_id', 'title', 'main_category', 'brand', 'price', 'rating', 'rating_count',
+    'description', 'features', 'image_url', 'details', 'in_stock', 'condition'
+)
+
+# Rows are COPYed into a session-local staging table, then merged with one
+# INSERT ... SELECT. `ord` preserves arrival order so the last duplicate of
+# a product_id within a batch wins, as it did with row-by-row upserts.
+STAGE_TABLE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS products_stage (
+        LIKE products INCLUDING DEFAULTS,
+        ord BIGSERIAL
+    ) ON COMMIT DELETE ROWS
+"""
+
+# price/rating are staged as float8 so Python floats go over binary COPY
+# as-is; the merge casts them to the NUMERIC columns of products
+STAGE_FLOAT_COLUMNS_SQL = """
+    ALTER TABLE products_stage
+        ALTER COLUMN price TYPE float8,
+        ALTER COLUMN rating TYPE float8
+"""
+
+COPY_STAGE_SQL = f"COPY products_stage ({', '.join(PRODUCT_COLUMNS)}) FROM STDIN (FORMAT BINARY)"
+
+# Binary COPY needs the wire type of every column, in PRODUCT_COLUMNS order
+COPY_STAGE_TYPES = (
+    'varchar', 'text', 'varchar', 'varchar', 'float8', 'float8', 'int4',
+    'text', 'jsonb', 'text', 'jsonb', 'bool', 'varchar'
+)
+
+MERGE_STAGE_SQL = f"""
+    INSERT INTO products ({', '.join(PRODUCT_COLUMNS)})
+    SELECT DISTINCT ON (product_id) {', '.join(PRODUCT_COLUMNS)}
+    FROM products_stage
+    ORDER BY product_id, ord DESC
+    ON CONFLICT (product_id) DO UPDATE SET
+        title = EXCLUDED.title,
+        main_category = EXCLUDED.main_category,
+        brand = EXCLUDED.brand,
+        price = EXCLUDED.price,
+        rating = EXCLUDED.rating,
+        rating_count = EXCLUDED.rating_count,
+        description = EXCLUDED.description,
+        features = EXCLUDED.features,
+        image_url = EXCLUDED.image_url,
+        details = EXCLUDED.details,
+        in_stock = EXCLUDED.in_stock,
+        condition = EXCLUDED.condition
+"""
+
+
+def _json_passthrough(serialized: str) -> str:
+    """Jsonb dumps for Product's pre-serialized JSON columns."""
+    return serialized
+
+
+def create_stage_table(conn):
+    """Create the session-local staging table used by insert_products_batch."""
+    conn.execute(STAGE_TABLE_SQL)
+    conn.execute(STAGE_FLOAT_COLUMNS_SQL)
+    conn.commit()
+
+
+def insert_products_batch(products: List[Product], conn) -> int:
+    """
+    Upsert and commit a batch of products via COPY into a staging table.
     
-    # Match existing schema: main_category column, but store normalized value
-    query = """
-        INSERT INTO products (
-            product_id, title, main_category, brand, price, rating, rating_count,
-            description, features, image_url, details, in_stock, condition
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-        )
-        ON CONFLICT (product_id) DO UPDATE SET
-            title = EXCLUDED.title,
-            main_category = EXCLUDED.main_category,
-            brand = EXCLUDED.brand,
-            price = EXCLUDED.price,
-            rating = EXCLUDED.rating,
-            rating_count = EXCLUDED.rating_count,
-            description = EXCLUDED.description,
-            features = EXCLUDED.features,
-            image_url = EXCLUDED.image_url,
-            details = EXCLUDED.details,
-            in_stock = EXCLUDED.in_stock,
-            condition = EXCLUDED.condition
+    One streamed binary COPY replaces a round-trip per row, and numbers,
+    booleans and JSONB travel in binary form so the server parses no text.
+    The merge and the COMMIT then go out together in pipeline mode (COPY
+    itself cannot be pipelined), so the server acknowledges both with a
+    single sync. The merge is a server-side prepared statement, planned
+    once per session.
     """
+    from psycopg.types.json import Jsonb
     
-    values = [
-        (
-            p.product_id, p.title, p.normalized_category, p.brand, p.price,
-            p.rating, p.rating_count, p.description, 
-            json.dumps(p.features),  # Convert list to JSON string
-            p.image_url, json.dumps(p.details), p.in_stock, p.condition
-        )
-        for p in products
-    ]
+    if not products:
+        return 0
     
-    cursor.executemany(query, values)
-    return len(values)
+    with conn.cursor() as cursor:
+        # Match existing schema: main_category column, but store normalized value
+        with cursor.copy(COPY_STAGE_SQL) as copy:
+            copy.set_types(COPY_STAGE_TYPES)
+            for p in products:
+                copy.write_row((
+                    p.product_id, p.title, p.normalized_category, p.brand, p.price,
+                    p.rating, p.rating_count, p.description,
+                    Jsonb(p.features_json, dumps=_json_passthrough), p.image_url,
+                    Jsonb(p.details_json, dumps=_json_passthrough), p.in_stock, p.condition
+                ))
+        
+        with conn.pipeline():
+            cursor.execute(MERGE_STAGE_SQL, prepare=True)
+            conn.commit()
+    return len(products)
 
 
 # ============================================================
@@ -370,8 +748,9 @@ def insert_products_batch(products: List[Product], cursor) -> int:
 def create_qdrant_collection(client, collection_name: str, recreate: bool = False):
     """Create or recreate Qdrant collection with proper config."""
     from qdrant_client.models import (
-        Distance, VectorParams, OptimizersConfigDiff,
-        HnswConfigDiff, PayloadSchemaType
+        Distance, Datatype, VectorParams, OptimizersConfigDiff,
+        HnswConfigDiff, PayloadSchemaType,
+        ScalarQuantization, ScalarQuantizationConfig, ScalarType
     )
     
     collections = client.get_collections()
@@ -385,24 +764,62 @@ def create_qdrant_collection(client, collection_name: str, recreate: bool = Fals
             print(f"   ✓ Collection '{collection_name}' exists, will upsert")
             return
     
-    # Create optimized collection for 500K vectors
+    # Create optimized collection for 500K vectors. The HNSW graph is
+    # deferred (m=0, indexing off) so bulk upserts don't compete with index
+    # construction; finalize_qdrant_collection builds it once at the end.
     client.create_collection(
         collection_name=collection_name,
         vectors_config=VectorParams(
             size=384,  # all-MiniLM-L6-v2 dimension
-            distance=Distance.COSINE
+            # Vectors are L2-normalized at encode time, so dot product equals
+            # cosine without Qdrant re-normalizing every point and query
+            distance=Distance.DOT,
+            datatype=Datatype.FLOAT16,  # MiniLM vectors lose nothing measurable at fp16
+            on_disk=True  # Originals only for rescoring; int8 copy stays in RAM
+        ),
+        quantization_config=ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
         ),
         optimizers_config=OptimizersConfigDiff(
-            indexing_threshold=20000,  # Start indexing after 20K points
+            indexing_threshold=0,      # No indexing during bulk load
             memmap_threshold=50000,    # Use memmap for large collections
         ),
         hnsw_config=HnswConfigDiff(
-            m=16,                # Number of edges per node
+            m=0,                 # Defer graph construction
             ef_construct=100,    # Construction search depth
             full_scan_threshold=10000  # Use HNSW after 10K points
         )
     )
-    print(f"   ✅ Created collection '{collection_name}'")
+    print(f"   ✅ Created collection '{collection_name}' (indexing deferred)")
+
+
+def finalize_qdrant_collection(client, collection_name: str,
+                               poll_interval: float = 5.0, max_wait: float = 3600.0):
+    """Enable HNSW indexing after the bulk load and wait for it to finish."""
+    from qdrant_client.models import OptimizersConfigDiff, HnswConfigDiff, CollectionStatus
+    
+    print("   🏗️  Building HNSW index...")
+    client.update_collection(
+        collection_name=collection_name,
+        hnsw_config=HnswConfigDiff(m=16),  # Number of edges per node
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=20000)
+    )
+    
+    waited = 0.0
+    while waited < max_wait:
+        status = client.get_collection(collection_name).status
+        if status == CollectionStatus.GREEN:
+            print(f"   ✓ Index ready ({waited:.0f}s)")
+            return True
+        time.sleep(poll_interval)
+        waited += poll_interval
+    
+    print(f"   ⚠️ Index still building after {max_wait:.0f}s; it will finish in the background")
+    return False
 
 
 def create_payload_indexes(client, collection_name: str):
@@ -464,64 +881,131 @@ def create_payload_indexes(client, collection_name: str):
         print(f"      ⚠️ name: {e}")
 
 
+def _is_transient_upload_error(e: Exception) -> bool:
+    """Whether a failed upload is a gRPC UNAVAILABLE/DEADLINE_EXCEEDED worth retrying."""
+    try:
+        import grpc
+    except ImportError:
+        return False
+    return isinstance(e, grpc.RpcError) and e.code() in (
+        grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED
+    )
+
+
 def upload_to_qdrant_batch(client, collection_name: str, 
                            products: List[Product], embeddings: np.ndarray,
-                           start_id: int, sub_batch_size: int = 50,
-                           max_retries: int = 5) -> int:
-    """Upload batch of products to Qdrant with retry logic."""
-    from qdrant_client.models import PointStruct
-    import time as time_module
-    
-    points = []
-    for idx, (product, embedding) in enumerate(zip(products, embeddings)):
-        point = PointStruct(
-            id=start_id + idx,
-            vector=embedding.tolist(),
-            payload={
-                "product_id": product.product_id,
-                "name": product.title,
-                "category": product.normalized_category,
-                "brand": product.brand,
-                "price": product.price,
-                "rating": product.rating,
-                "rating_count": product.rating_count,
-                "condition": product.condition,
-                "in_stock": product.in_stock
-            }
-        )
-        points.append(point)
+                           start_id: int, sub_batch_size: int = 1024,
+                           parallel: int = 1, max_retries: int = 1,
+                           attempts: int = 5, wait: bool = False) -> int:
+    """
+    Upload batch of products to Qdrant.
     
-    # Upload in smaller sub-batches with retry
-    uploaded = 0
-    for i in range(0, len(points), sub_batch_size):
-        sub_batch = points[i:i + sub_batch_size]
-        
-        for attempt in range(max_retries):
-            try:
-                client.upsert(collection_name=collection_name, points=sub_batch)
-                uploaded += len(sub_batch)
-                break
-            except Exception as e:
-                error_msg = str(e).lower()
-                is_timeout = 'timeout' in error_msg or 'timed out' in error_msg
-                
-                if attempt < max_retries - 1:
-                    # Longer waits for timeouts: 5, 10, 20, 40 seconds
-                    wait_time = 5 * (2 ** attempt) if is_timeout else 2 ** attempt
-                    print(f"\n   ⚠️ Retry {attempt + 1}/{max_retries} in {wait_time}s...")
-                    time_module.sleep(wait_time)
-                else:
-                    print(f"\n❌ Failed after {max_retries} retries: {e}")
-                    # Return what we uploaded so far instead of crashing
-                    return uploaded
+    upload_collection splits the batch into sub-batches, streaming them over
+    the client's persistent (gRPC) connection. It always waits out and
+    retries rate-limit responses itself. Transient gRPC errors (UNAVAILABLE,
+    DEADLINE_EXCEEDED) re-send the batch with backoff, up to `attempts`
+    times; upserts by id make that safe. Any other error is raised, so the
+    caller never checkpoints past a batch Qdrant didn't get.
     
-    return uploaded
+    Writes are not awaited by default so the server applies one sub-batch
+    while the next is in flight. main() sends the last batch with wait=True:
+    Qdrant applies a collection's updates in order, so once it returns every
+    earlier upsert has landed too.
+    """
+    # One C-level conversion of the whole matrix instead of a tolist() per row
+    vectors = embeddings.tolist()
+    payloads = [
+        {
+            "product_id": product.product_id,
+            "name": product.title,
+            "category": product.normalized_category,
+            "brand": product.brand,
+            "price": product.price,
+            "rating": product.rating,
+            "rating_count": product.rating_count,
+            "condition": product.condition,
+            "in_stock": product.in_stock
+        }
+        for product in products
+    ]
+    
+    for attempt in range(1, attempts + 1):
+        try:
+            client.upload_collection(
+                collection_name=collection_name,
+                vectors=vectors,
+                payload=payloads,
+                ids=range(start_id, start_id + len(products)),
+                batch_size=min(sub_batch_size, len(products)),
+                parallel=parallel,
+                max_retries=max_retries,
+                wait=wait
+            )
+            return len(products)
+        except Exception as e:
+            if attempt == attempts or not _is_transient_upload_error(e):
+                print(f"\n❌ Qdrant upload failed (attempt {attempt}/{attempts}): {e}")
+                raise
+            delay = min(2 ** attempt, 30)
+            print(f"\n⚠️ Qdrant upload attempt {attempt}/{attempts} failed ({e.code().name}), "
+                  f"retrying in {delay}s")
+            time.sleep(delay)
 
 
 # ============================================================
 # MAIN PIPELINE
 # ============================================================
 
+GC_INTERVAL = 50000
+
+
+def save_checkpoint(path: Path, state: Dict):
+    """Write the checkpoint atomically so an interrupt never leaves it half-written."""
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+class CheckpointWriter:
+    """
+    Writes checkpoints from a background thread, keeping only the latest state.
+    
+    submit() never blocks on disk: if a write is still pending, the stale
+    state is replaced by the newer one. close() flushes the last state.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._pending = queue.Queue(maxsize=1)
+        self._thread = threading.Thread(target=self._run, name="ingest-checkpoint", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while True:
+            state = self._pending.get()
+            if state is None:
+                return
+            save_checkpoint(self.path, state)
+    
+    def submit(self, state: Dict):
+        while True:
+            try:
+                self._pending.put_nowait(state)
+                return
+            except queue.Full:
+                try:
+                    self._pending.get_nowait()  # Drop the stale state
+                except queue.Empty:
+                    pass
+    
+    def close(self):
+        """Write any pending state and stop the writer thread."""
+        if self._thread.is_alive():
+            self._pending.put(None)
+            self._thread.join()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Ingest 500K products")
     parser.add_argument("--jsonl", type=str, required=True,
@@ -538,6 +1022,14 @@ def main():
                         help="Skip PostgreSQL insert")
     parser.add_argument("--skip-qdrant", action="store_true",
                         help="Skip Qdrant upload")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes for JSON parsing (1 = inline)")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch",
+                        help="Embedding backend: torch (SentenceTransformer) or onnx (INT8, CPU)")
+    parser.add_argument("--no-embed-cache", action="store_true",
+                        help="Disable the on-disk embedding cache")
+    parser.add_argument("--exact-count", action="store_true",
+                        help="Count JSONL lines exactly for the progress bar (full pre-pass)")
     
     args = parser.parse_args()
     
@@ -545,6 +1037,7 @@ def main():
     base_dir = Path(__file__).parent.parent
     jsonl_path = base_dir / args.jsonl
     checkpoint_path = base_dir / 'data' / 'ingestion_checkpoint.json'
+    embed_cache_path = base_dir / 'data' / 'embedding_cache.sqlite'
     
     if not jsonl_path.exists():
         print(f"❌ File not found: {jsonl_path}")
@@ -560,35 +1053,59 @@ def main():
     
     # Load checkpoint if resuming
     skip_count = 0
+    resume_offset = None
+    resume_skip = 0
     if args.resume and checkpoint_path.exists():
         with open(checkpoint_path, 'r') as f:
             checkpoint = json.load(f)
             skip_count = checkpoint.get('processed', 0)
             print(f"📍 Resuming from checkpoint: {skip_count:,} products processed")
+        # Newer checkpoints record where to seek instead of re-parsing
+        # every already-processed line
+        if 'offset' in checkpoint:
+            resume_offset = checkpoint['offset']
+            resume_skip = checkpoint.get('skip', 0)
+            print(f"   Seeking to byte {resume_offset:,}")
     
     # Initialize components
     print("🔧 Initializing components...")
     
-    # Sentence Transformers
-    from sentence_transformers import SentenceTransformer
-    print("   Loading embedding model (GPU)...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    device = 'cuda' if model.device.type == 'cuda' else 'cpu'
-    print(f"   ✓ Model loaded on {device.upper()}")
+    # Embedding model
+    if args.backend == 'onnx':
+        from core.embeddings import OnnxEmbeddingModel
+        print("   Loading embedding model (ONNX INT8)...")
+        model = OnnxEmbeddingModel()
+        model_id = 'onnx:all-MiniLM-L6-v2:int8'
+        print("   ✓ Model loaded on CPU (ONNX Runtime)")
+    else:
+        from sentence_transformers import SentenceTransformer
+        print("   Loading embedding model (GPU)...")
+        model = SentenceTransformer('all-MiniLM-L6-v2')
+        device = 'cuda' if model.device.type == 'cuda' else 'cpu'
+        if device == 'cuda':
+            # FP16 halves activation bandwidth and runs on tensor cores;
+            # MiniLM embeddings are stable at this precision after L2 norm
+            model = model.half()
+        model_id = f"torch:all-MiniLM-L6-v2:{'fp16' if device == 'cuda' else 'fp32'}"
+        print(f"   ✓ Model loaded on {device.upper()}{' (FP16)' if device == 'cuda' else ''}")
+    
+    embed_cache = None
+    if not args.no_embed_cache:
+        embed_cache = EmbeddingCache(embed_cache_path, model_id)
+        print(f"   ✓ Embedding cache: {embed_cache_path.name}")
     
     # PostgreSQL
     pg_conn = None
-    pg_cursor = None
     if not args.skip_postgres:
-        import psycopg2
-        pg_conn = psycopg2.connect(
+        import psycopg
+        pg_conn = psycopg.connect(
             host=os.getenv('POSTGRES_HOST', 'localhost'),
             port=os.getenv('POSTGRES_PORT', 5432),
-            database=os.getenv('POSTGRES_DB', 'valora'),
+            dbname=os.getenv('POSTGRES_DB', 'valora'),
             user=os.getenv('POSTGRES_USER', 'postgres'),
             password=os.getenv('POSTGRES_PASSWORD', '')
         )
-        pg_cursor = pg_conn.cursor()
+        create_stage_table(pg_conn)
         print("   ✓ PostgreSQL connected")
     
     # Qdrant
@@ -596,12 +1113,17 @@ def main():
     if not args.skip_qdrant:
         from qdrant_client import QdrantClient
         # Create client with longer timeouts for large uploads
+        # gRPC multiplexes the upload sub-batches over one persistent
+        # connection; longer timeout for large uploads
+        prefer_grpc = os.getenv('QDRANT_PREFER_GRPC', 'true').lower() == 'true'
         qdrant_client = QdrantClient(
             url=os.getenv('QDRANT_URL'),
             api_key=os.getenv('QDRANT_API_KEY'),
+            prefer_grpc=prefer_grpc,
+            grpc_port=int(os.getenv('QDRANT_GRPC_PORT', '6334')),
             timeout=120  # 2 minute timeout instead of default 30s
         )
-        print("   ✓ Qdrant connected (timeout: 120s)")
+        print(f"   ✓ Qdrant connected ({'gRPC' if prefer_grpc else 'HTTP'}, timeout: 120s)")
         
         # Create/verify collection (skip if resuming)
         collection_name = "products_main"
@@ -613,107 +1135,172 @@ def main():
     # Process in batches
     total_processed = skip_count
     total_uploaded = skip_count
+    last_gc = skip_count
     start_time = time.time()
-    batch_products = []
+    
+    completed = False
+    upload_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ingest-upload")
+    
+    # Two-stage pipeline: the main thread encodes batch N+1 on the GPU while
+    # the upload thread writes batch N to PostgreSQL and Qdrant. maxsize=2
+    # bounds how many encoded batches can wait in memory
+    upload_queue = queue.Queue(maxsize=2)
+    upload_errors = []
+    checkpoints = CheckpointWriter(checkpoint_path)
+    
+    def upload_worker():
+        nonlocal total_processed, total_uploaded, resume_offset, resume_skip
+        while True:
+            item = upload_queue.get()
+            if item is None:
+                return
+            if upload_errors:
+                continue  # Keep draining so the encoder never blocks on put
+            batch_products, embeddings, start_id, position, last = item
+            try:
+                # PostgreSQL and Qdrant legs run concurrently: independent
+                # servers, and both clients release the GIL on network I/O
+                legs = []
+                if pg_conn:
+                    legs.append(upload_pool.submit(insert_products_batch, batch_products, pg_conn))
+                if qdrant_client:
+                    legs.append(upload_pool.submit(
+                        upload_to_qdrant_batch,
+                        qdrant_client, "products_main",
+                        batch_products, embeddings,
+                        start_id=start_id, wait=last
+                    ))
+                for leg in legs:
+                    leg.result()
+            except BaseException as e:
+                upload_errors.append(e)
+                continue
+            
+            total_processed += len(batch_products)
+            total_uploaded += len(batch_products)
+            
+            # Update progress
+            elapsed = time.time() - start_time
+            rate = total_processed / elapsed if elapsed > 0 else 0
+            pbar.update(len(batch_products))
+            pbar.set_postfix({
+                'uploaded': f'{total_uploaded:,}',
+                'rate': f'{rate:.0f}/s'
+            })
+            
+            # Save checkpoint only once the batch is in both stores
+            resume_offset, resume_skip = position
+            checkpoints.submit({
+                'processed': total_processed,
+                'uploaded': total_uploaded,
+                'offset': resume_offset,
+                'skip': resume_skip,
+                'timestamp': time.time()
+            })
+    
+    uploader = threading.Thread(target=upload_worker, name="ingest-uploader", daemon=True)
+    
+    # Hundreds of thousands of live Products make automatic young-generation
+    # scans expensive; collect explicitly every GC_INTERVAL products instead.
+    # The model and clients live for the whole run, so freeze them into the
+    # permanent generation and keep them out of every collection
+    gc.collect()
+    gc.freeze()
+    gc.disable()
     
     print("🔄 Processing products...")
     print("-" * 70)
     
     try:
         # Create progress bar for entire dataset
+        line_total = count_lines(jsonl_path) if args.exact_count else estimate_lines(jsonl_path)
         pbar = tqdm(
-            stream_products(jsonl_path, limit=args.limit, skip=skip_count),
-            total=args.limit - skip_count,
+            total=max(min(args.limit, line_total) - skip_count, 0),
             desc="Products",
-            unit="prod"
+            unit="prod",
+            smoothing=0.1  # Tolerates the approximate total
         )
         
-        for product in pbar:
-            batch_products.append(product)
-            
-            # Process batch when full
-            if len(batch_products) >= args.batch_size:
-                # Generate embeddings
-                texts = [create_embedding_text(p) for p in batch_products]
-                embeddings = generate_embeddings_batch(texts, model)
-                
-                # Upload to PostgreSQL
-                if pg_cursor:
-                    insert_products_batch(batch_products, pg_cursor)
-                    pg_conn.commit()
-                
-                # Upload to Qdrant
-                if qdrant_client:
-                    upload_to_qdrant_batch(
-                        qdrant_client, "products_main",
-                        batch_products, embeddings,
-                        start_id=total_uploaded
-                    )
-                
-                total_processed += len(batch_products)
-                total_uploaded += len(batch_products)
-                
-                # Update progress
-                elapsed = time.time() - start_time
-                rate = total_processed / elapsed if elapsed > 0 else 0
-                pbar.set_postfix({
-                    'uploaded': f'{total_uploaded:,}',
-                    'rate': f'{rate:.0f}/s'
-                })
-                
-                # Save checkpoint
-                with open(checkpoint_path, 'w') as f:
-                    json.dump({
-                        'processed': total_processed,
-                        'uploaded': total_uploaded,
-                        'timestamp': time.time()
-                    }, f)
-                
-                # Clear batch and free memory
-                batch_products = []
-                gc.collect()
+        # --limit is a total, so a resumed run only streams what is left
+        remaining = max(args.limit - skip_count, 0)
+        if resume_offset is not None:
+            products = stream_products(
+                jsonl_path, limit=remaining, skip=resume_skip,
+                workers=args.workers, start_offset=resume_offset, with_positions=True
+            )
+        else:
+            products = stream_products(jsonl_path, limit=remaining, skip=skip_count,
+                                       workers=args.workers, with_positions=True)
+        batches = prefetch_batches(products, args.batch_size)
+        uploader.start()
         
-        # Process remaining products
-        if batch_products:
-            texts = [create_embedding_text(p) for p in batch_products]
-            embeddings = generate_embeddings_batch(texts, model)
-            
-            if pg_cursor:
-                insert_products_batch(batch_products, pg_cursor)
-                pg_conn.commit()
+        next_id = total_uploaded
+        for batch_products, texts, position, last in batches:
+            if upload_errors:
+                raise upload_errors[0]
             
-            if qdrant_client:
-                upload_to_qdrant_batch(
-                    qdrant_client, "products_main",
-                    batch_products, embeddings,
-                    start_id=total_uploaded
-                )
+            # Generate embeddings (the next batch is parsed meanwhile and the
+            # previous one is uploaded meanwhile)
+            embeddings = generate_embeddings_cached(texts, model, embed_cache)
+            upload_queue.put((batch_products, embeddings, next_id, position, last))
+            next_id += len(batch_products)
             
-            total_processed += len(batch_products)
-            total_uploaded += len(batch_products)
+            # Free memory
+            del batch_products, texts, embeddings
+            if next_id - last_gc >= GC_INTERVAL:
+                gc.collect(1)  # Young generations only; batches die young
+                last_gc = next_id
+        
+        upload_queue.put(None)
+        uploader.join()
+        if upload_errors:
+            raise upload_errors[0]
         
         pbar.close()
+        completed = True
         
     except KeyboardInterrupt:
         print("\n\n⚠️ Interrupted! Saving checkpoint...")
-        with open(checkpoint_path, 'w') as f:
-            json.dump({
-                'processed': total_processed,
-                'uploaded': total_uploaded,
-                'timestamp': time.time()
-            }, f)
+        # Drop batches still waiting for upload and let the in-flight one
+        # finish, so the checkpoint matches what actually reached the stores
+        if uploader.is_alive():
+            while True:
+                try:
+                    upload_queue.get_nowait()
+                except queue.Empty:
+                    break
+            upload_queue.put(None)
+            uploader.join()
+        checkpoints.close()
+        checkpoint = {
+            'processed': total_processed,
+            'uploaded': total_uploaded,
+            'timestamp': time.time()
+        }
+        if resume_offset is not None:
+            checkpoint.update(offset=resume_offset, skip=resume_skip)
+        save_checkpoint(checkpoint_path, checkpoint)
         print(f"   Checkpoint saved at {total_processed:,} products")
         print("   Run with --resume to continue")
     
     finally:
-        if pg_cursor:
-            pg_cursor.close()
+        checkpoints.close()
+        gc.enable()
+        gc.unfreeze()
+        upload_pool.shutdown(wait=True)
+        if embed_cache:
+            embed_cache.close()
         if pg_conn:
             pg_conn.close()
     
     # Create indexes after upload
     if qdrant_client and not args.skip_qdrant:
         print()
+        if completed:
+            print("🏗️  Finalizing Qdrant collection...")
+            finalize_qdrant_collection(qdrant_client, "products_main")
+        else:
+            print("⏸️  HNSW indexing stays deferred until the ingest completes")
         print("📇 Creating Qdrant payload indexes...")
         create_payload_indexes(qdrant_client, "products_main")
         
@@ -732,8 +1319,8 @@ def main():
     print(f"🚀 Rate: {total_processed/elapsed:.0f} products/second")
     print()
     
-    # Cleanup checkpoint
-    if checkpoint_path.exists():
+    # Cleanup checkpoint; an interrupted run keeps it for --resume
+    if completed and checkpoint_path.exists():
         checkpoint_path.unlink()
         print("🧹 Checkpoint file removed")
 
@@ -2,12 +2,14 @@
 Amazon JSONL Data Ingestion Pipeline
 Loads real Amazon products into PostgreSQL and Qdrant
 """
-import json
 import argparse
+import mmap
+import os
 import time
 from pathlib import Path
 from typing import List, Optional, Generator
 import numpy as np
+import orjson
 from tqdm import tqdm
 
 # Add parent to path
@@ -18,6 +20,10 @@ from db.connection import init_pool, close_pool
 from db.products import Product, create_products_table, insert_products, get_product_count
 
 
+# Shared Qdrant client: one connection (and TLS handshake) for the process
+_qdrant_client = None
+
+
 def parse_jsonl(filepath: Path, limit: Optional[int] = None) -> Generator[dict, None, None]:
     """
     Parse JSONL file line by line (memory efficient).
@@ -30,14 +36,19 @@ def parse_jsonl(filepath: Path, limit: Optional[int] = None) -> Generator[dict,
         Parsed JSON records
     """
     count = 0
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line in f:
+    if filepath.stat().st_size == 0:
+        return
+    
+    # mmap lets readline split lines in C straight from the page cache;
+    # orjson parses the raw bytes, so there is no text decode or strip() copy
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line in iter(mm.readline, b''):
             if limit and count >= limit:
                 break
             try:
-                yield json.loads(line.strip())
+                yield orjson.loads(line)
                 count += 1
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 continue
 
 
@@ -78,7 +89,7 @@ def filter_valid_products(records: Generator, min_price: float = 1.0) -> List[Pr
     return products
 
 
-def generate_embeddings(products: List[Product], batch_size: int = 32) -> np.ndarray:
+def generate_embeddings(products: List[Product], batch_size: int = 512) -> np.ndarray:
     """
     Generate embeddings for products using sentence-transformers.
     
@@ -93,6 +104,11 @@ def generate_embeddings(products: List[Product], batch_size: int = 32) -> np.nda
     
     print("🔄 Loading sentence-transformers model...")
     model = SentenceTransformer('all-MiniLM-L6-v2')
+    if model.device.type == 'cuda':
+        # FP16 on GPU: tensor-core matmuls and half the activation memory
+        model = model.half()
+    else:
+        batch_size = min(batch_size, 64)
     
     # Create text representations
     texts = []
@@ -106,12 +122,44 @@ def generate_embeddings(products: List[Product], batch_size: int = 32) -> np.nda
         texts,
         batch_size=batch_size,
         show_progress_bar=True,
-        convert_to_numpy=True
+        convert_to_numpy=True,
+        normalize_embeddings=True  # L2 normalize for cosine similarity
     )
     
     return embeddings
 
 
+def get_qdrant_client():
+    """
+    Get the process-wide Qdrant client, creating it on first use.
+    
+    Returns:
+        QdrantClient, or None if QDRANT_URL is not set
+    """
+    global _qdrant_client
+    
+    if _qdrant_client is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+        
+        from qdrant_client import QdrantClient
+        
+        qdrant_url = os.getenv("QDRANT_URL")
+        if not qdrant_url:
+            print("❌ QDRANT_URL not set in .env")
+            return None
+        
+        print(f"🔗 Connecting to Qdrant: {qdrant_url[:50]}...")
+        _qdrant_client = QdrantClient(
+            url=qdrant_url,
+            api_key=os.getenv("QDRANT_API_KEY"),
+            prefer_grpc=os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true",
+            grpc_port=int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+        )
+    
+    return _qdrant_client
+
+
 def upload_to_qdrant(products: List[Product], embeddings: np.ndarray, 
                      collection_name: str = "products_main") -> bool:
     """
@@ -125,23 +173,12 @@ def upload_to_qdrant(products: List[Product], embeddings: np.ndarray,
     Returns:
         True if successful
     """
-    import os
-    from dotenv import load_dotenv
-    load_dotenv()
-    
-    from qdrant_client import QdrantClient
     from qdrant_client.models import Distance, VectorParams, PointStruct
     
-    qdrant_url = os.getenv("QDRANT_URL")
-    qdrant_api_key = os.getenv("QDRANT_API_KEY")
-    
-    if not qdrant_url:
-        print("❌ QDRANT_URL not set in .env")
+    client = get_qdrant_client()
+    if client is None:
         return False
     
-    print(f"🔗 Connecting to Qdrant: {qdrant_url[:50]}...")
-    client = QdrantClient(url=qdrant_url, api_key=qdrant_api_key)
-    
     # Recreate collection
     try:
         collections = client.get_collections()
@@ -153,7 +190,8 @@ def upload_to_qdrant(products: List[Product], embeddings: np.ndarray,
         
         client.create_collection(
             collection_name=collection_name,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE)
+            # Embeddings are L2-normalized in generate_embeddings: dot == cosine
+            vectors_config=VectorParams(size=384, distance=Distance.DOT)
         )
         print(f"✅ Created collection '{collection_name}'")
     except Exception as e:
@@ -6,26 +6,103 @@ This script simulates realistic user behavior to populate the
 success indicators with test data.
 
 Usage:
-    python scripts/simulate_analytics.py --sessions 50
+    python scripts/simulate_analytics.py --sessions 50 --concurrency 10
 """
 
 import argparse
+import asyncio
+import heapq
 import random
-import time
+import signal
 import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import count
 from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+import numpy as np
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from core.success_indicators import (
-    SuccessIndicators, generate_session_id, track_search,
-    track_click, track_cart_add
-)
+from core.success_indicators import SuccessIndicators, generate_session_id
+
+
+BUDGETS = [500, 1000, 1500, 2000, 3000, 5000]
+
+QUERIES = [
+    "gaming laptop",
+    "wireless headphones",
+    "4k monitor",
+    "mechanical keyboard",
+    "gaming mouse",
+    "rtx 4080 graphics card",
+    "standing desk",
+    "ergonomic chair",
+    "webcam 1080p",
+    "usb-c hub",
+    "ssd 1tb",
+    "gaming setup bundle"
+]
+
+PATHS = ["fast", "smart", "deep"]
+PATH_WEIGHTS = [0.2, 0.6, 0.2]  # Smart path most common
+PATH_LATENCIES = {"fast": 50, "smart": 180, "deep": 600}
+
+# Fallback generators for sessions simulated outside a BatchSimulator
+_RNG = random.Random()
+_PRICE_RNG = np.random.default_rng()
+
+
+class EventBuffer:
+    """
+    Collects tracking events and hands them to indicators.bulk_track in
+    batches, so each event log is appended once per flush, not per event.
+    
+    Events wait in a min-heap keyed by their simulated time and leave it in
+    time order. Think time stamps events ahead of the wall clock, so the
+    periodic flush only releases events that are already due: a session
+    that starts later can't precede them. A final flush() drains the rest.
+    """
+    
+    def __init__(self, indicators: SuccessIndicators, flush_size: int = 256):
+        self.indicators = indicators
+        self.flush_size = flush_size
+        self._heap: List[tuple] = []
+        self._seq = count()  # Keeps a session's same-time events in order
+        self._since_flush = 0
+    
+    def append(self, kind: str, ts: datetime, **kwargs):
+        """Queue one event at simulated time `ts`; flushes every flush_size events."""
+        heapq.heappush(self._heap, (ts, next(self._seq), kind, kwargs))
+        self._since_flush += 1
+        if self._since_flush >= self.flush_size:
+            self.flush(until=datetime.now())
+    
+    def flush(self, until: Optional[datetime] = None):
+        """Write out queued events in time order, up to `until` (default: all)."""
+        self._since_flush = 0
+        events = []
+        while self._heap and (until is None or self._heap[0][0] <= until):
+            ts, _, kind, kwargs = heapq.heappop(self._heap)
+            if kind != "end_session":
+                kwargs["ts"] = ts
+            events.append((kind, kwargs))
+        if events:
+            self.indicators.bulk_track(events)
 
 
-def simulate_user_session(indicators: SuccessIndicators, 
-                          session_num: int,
-                          realistic: bool = True):
+async def simulate_user_session(indicators: SuccessIndicators, 
+                                session_num: int,
+                                realistic: bool = True,
+                                query: Optional[str] = None,
+                                budget: Optional[int] = None,
+                                path: Optional[str] = None,
+                                rng: Optional[random.Random] = None,
+                                price_rng: Optional[np.random.Generator] = None,
+                                fast: bool = False,
+                                events: Optional[EventBuffer] = None):
     """
     Simulate a single user session with realistic behavior.
     
@@ -34,58 +111,68 @@ def simulate_user_session(indicators: SuccessIndicators,
     - 30% of clickers add to cart
     - Users prefer products within budget
     - Time to click varies (faster for relevant results)
+    
+    query/budget/path are drawn at random unless given (BatchSimulator
+    pre-draws them for the whole run). `rng` serves the scalar draws and
+    `price_rng` the vectorized price and click draws; each BatchSimulator worker
+    passes its own pair.
+    
+    Think time never blocks: it advances a per-session simulated clock that
+    stamps the click and cart events. With `fast` the clock stays put.
+    
+    Events go to `events` (shared across a BatchSimulator run); without
+    one, the session's events are flushed when it ends.
     """
+    rng = rng or _RNG
+    price_rng = price_rng if price_rng is not None else _PRICE_RNG
+    own_events = events is None
+    if own_events:
+        events = EventBuffer(indicators)
+    
     session_id = generate_session_id()
     user_id = f"simulated_user_{session_num}"
     
     # Random budget between $100 and $5000
-    budget = random.choice([500, 1000, 1500, 2000, 3000, 5000])
+    if budget is None:
+        budget = rng.choice(BUDGETS)
     
     # Random query
-    queries = [
-        "gaming laptop",
-        "wireless headphones",
-        "4k monitor",
-        "mechanical keyboard",
-        "gaming mouse",
-        "rtx 4080 graphics card",
-        "standing desk",
-        "ergonomic chair",
-        "webcam 1080p",
-        "usb-c hub",
-        "ssd 1tb",
-        "gaming setup bundle"
-    ]
-    query = random.choice(queries)
+    if query is None:
+        query = rng.choice(QUERIES)
     
     # Random search path
-    paths = ["fast", "smart", "deep"]
-    path_weights = [0.2, 0.6, 0.2]  # Smart path most common
-    path = random.choices(paths, weights=path_weights)[0]
+    if path is None:
+        path = rng.choices(PATHS, weights=PATH_WEIGHTS)[0]
     
     # Random latency based on path
-    latencies = {"fast": 50, "smart": 180, "deep": 600}
-    latency = latencies[path] + random.randint(-20, 50)
+    latency = PATH_LATENCIES[path] + rng.randint(-20, 50)
     
     # Generate mock products
-    num_products = random.randint(5, 20)
-    products = []
+    num_products = rng.randint(5, 20)
     
-    for i in range(num_products):
-        # Mix of within and over budget
-        if random.random() < 0.85:  # 85% within budget
-            price = random.uniform(budget * 0.3, budget * 0.95)
-        else:
-            price = random.uniform(budget * 1.05, budget * 1.5)
-        
-        products.append({
+    # Mix of within and over budget, all prices drawn in one vectorized call
+    over = price_rng.random(num_products) >= 0.85  # 85% within budget
+    low = np.where(over, budget * 1.05, budget * 0.3)
+    high = np.where(over, budget * 1.5, budget * 0.95)
+    price_arr = np.round(price_rng.uniform(low, high), 2)
+    prices = price_arr.tolist()
+    
+    products = [
+        {
             "product_id": f"product_{session_num}_{i}",
-            "price": round(price, 2),
+            "price": price,
             "name": f"Product {i} for {query}"
-        })
+        }
+        for i, price in enumerate(prices)
+    ]
     
-    # Track impressions
-    track_search(
+    # Simulated clock, starting when the results are shown
+    simulated_now = datetime.now()
+    
+    # Track impressions (tracking time is reported separately from think time)
+    track_start = time.perf_counter()
+    events.append(
+        "search", simulated_now,
         session_id=session_id,
         user_id=user_id,
         query=query,
@@ -94,72 +181,239 @@ def simulate_user_session(indicators: SuccessIndicators,
         path=path,
         latency_ms=latency
     )
+    track_seconds = time.perf_counter() - track_start
     
     # Simulate user behavior
-    will_click = random.random() < 0.60  # 60% click rate
+    will_click = rng.random() < 0.60  # 60% click rate
     
     if will_click:
         # Simulate time thinking (0.5s - 10s)
-        time.sleep(random.uniform(0.01, 0.1))  # Shortened for simulation
+        think_time = rng.uniform(0.5, 10)
+        if not fast:
+            simulated_now += timedelta(seconds=think_time)
         
         # Click 1-3 products
-        num_clicks = random.randint(1, min(3, len(products)))
-        
-        # Users prefer clicking top results and within-budget items
-        click_weights = []
-        for i, p in enumerate(products):
-            weight = 1 / (i + 1)  # Position bias
-            if p["price"] <= budget:
-                weight *= 2  # Prefer within-budget
-            click_weights.append(weight)
+        num_clicks = rng.randint(1, min(3, len(products)))
         
-        # Normalize weights
-        total_weight = sum(click_weights)
-        click_probs = [w / total_weight for w in click_weights]
+        # Users prefer clicking top results (position bias) and
+        # within-budget items (2x)
+        click_weights = np.where(price_arr <= budget, 2.0, 1.0) / np.arange(1, num_products + 1)
+        click_weights /= click_weights.sum()
         
-        clicked_indices = set()
-        for _ in range(num_clicks):
-            idx = random.choices(range(len(products)), weights=click_probs)[0]
-            if idx not in clicked_indices:
-                clicked_indices.add(idx)
-                product = products[idx]
-                
-                track_click(
-                    session_id=session_id,
-                    product_id=product["product_id"],
-                    position=idx,
-                    price=product["price"],
-                    budget=budget
-                )
+        # Distinct products in click order, drawn in one call
+        clicked_order = price_rng.choice(
+            num_products, size=num_clicks, replace=False, p=click_weights
+        ).tolist()
+        for idx in clicked_order:
+            product = products[idx]
+            
+            track_start = time.perf_counter()
+            events.append(
+                "click", simulated_now,
+                session_id=session_id,
+                product_id=product["product_id"],
+                position=idx,
+                price=product["price"],
+                budget=budget
+            )
+            track_seconds += time.perf_counter() - track_start
         
         # Some clickers add to cart
-        will_cart = random.random() < 0.30  # 30% of clickers add to cart
+        will_cart = rng.random() < 0.30  # 30% of clickers add to cart
         
-        if will_cart and clicked_indices:
-            time.sleep(random.uniform(0.01, 0.05))  # Thinking time
+        if will_cart:
+            think_time = rng.uniform(0.5, 5)  # Thinking time
+            if not fast:
+                simulated_now += timedelta(seconds=think_time)
             
             # Usually add the first clicked product
-            cart_idx = list(clicked_indices)[0]
+            cart_idx = clicked_order[0]
             product = products[cart_idx]
             
-            track_cart_add(
+            track_start = time.perf_counter()
+            events.append(
+                "cart_add", simulated_now,
                 session_id=session_id,
                 product_id=product["product_id"],
                 price=product["price"],
                 budget=budget,
                 is_recommended=True
             )
+            track_seconds += time.perf_counter() - track_start
     
     # End session
-    indicators.end_session(session_id)
+    track_start = time.perf_counter()
+    events.append("end_session", simulated_now, session_id=session_id)
+    if own_events:
+        events.flush()
+    track_seconds += time.perf_counter() - track_start
     
     return {
         "session_id": session_id,
         "clicked": will_click,
         "carted": will_click and will_cart,
         "budget": budget,
-        "query": query
+        "query": query,
+        "track_ms": track_seconds * 1000
+    }
+
+
+@dataclass
+class SessionResult:
+    """Outcome of one simulated session (error is set if it failed)."""
+    index: int
+    result: Optional[Dict] = None
+    error: Optional[Exception] = None
+    elapsed_ns: int = 0
+
+
+class BatchSimulator:
+    """
+    Streams session results from a fixed pool of worker tasks.
+    
+    Session indices are fed through a bounded queue and results are yielded
+    as they finish, so memory stays constant however many sessions run.
+    A failing session is reported instead of aborting the batch, and
+    shutdown() lets in-flight sessions finish but starts no new ones.
+    
+    Every worker owns its random generators, spawned from `seed`, so a
+    seeded run is reproducible. All sessions share one EventBuffer, which
+    is flushed when the stream ends.
+    """
+    
+    def __init__(self, indicators: SuccessIndicators, concurrency: int = 10,
+                 seed: Optional[int] = None, fast: bool = False):
+        self.indicators = indicators
+        self.concurrency = max(concurrency, 1)
+        self.seed = seed
+        self.fast = fast
+        self.events = EventBuffer(indicators)
+        self._shutdown = asyncio.Event()
+    
+    def shutdown(self):
+        """Stop starting new sessions."""
+        self._shutdown.set()
+    
+    async def stream(self, num_sessions: int) -> AsyncIterator[SessionResult]:
+        """Run `num_sessions` sessions, yielding each result as it completes."""
+        jobs: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue()
+        
+        plan_seed, *worker_seeds = np.random.SeedSequence(self.seed).spawn(self.concurrency + 1)
+        
+        # Draw every session's query, budget and path up front in three
+        # vectorized calls instead of three Python-level draws per session
+        rng = np.random.default_rng(plan_seed)
+        query_idx = rng.integers(len(QUERIES), size=num_sessions)
+        budget_idx = rng.integers(len(BUDGETS), size=num_sessions)
+        path_idx = rng.choice(len(PATHS), size=num_sessions, p=PATH_WEIGHTS)
+        
+        async def feed():
+            for i in range(num_sessions):
+                if self._shutdown.is_set():
+                    break
+                await jobs.put(i)
+            for _ in range(self.concurrency):
+                await jobs.put(None)
+        
+        async def work(seed: np.random.SeedSequence):
+            rng = random.Random(int(seed.generate_state(1)[0]))
+            price_rng = np.random.default_rng(seed)
+            while True:
+                i = await jobs.get()
+                if i is None or self._shutdown.is_set():
+                    break
+                start_ns = time.perf_counter_ns()
+                try:
+                    result = await simulate_user_session(
+                        self.indicators, i,
+                        query=QUERIES[query_idx[i]],
+                        budget=BUDGETS[budget_idx[i]],
+                        path=PATHS[path_idx[i]],
+                        rng=rng,
+                        price_rng=price_rng,
+                        fast=self.fast,
+                        events=self.events
+                    )
+                    outcome = SessionResult(i, result=result)
+                except Exception as e:
+                    outcome = SessionResult(i, error=e)
+                outcome.elapsed_ns = time.perf_counter_ns() - start_ns
+                await results.put(outcome)
+            await results.put(None)  # This worker is done
+        
+        tasks = [asyncio.create_task(feed())]
+        tasks += [asyncio.create_task(work(seed)) for seed in worker_seeds]
+        
+        try:
+            running = self.concurrency
+            while running:
+                outcome = await results.get()
+                if outcome is None:
+                    running -= 1
+                    continue
+                yield outcome
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.events.flush()
+
+
+async def run_simulation(indicators: SuccessIndicators, num_sessions: int,
+                         concurrency: int, seed: Optional[int] = None,
+                         fast: bool = False) -> Dict:
+    """Stream all sessions through a BatchSimulator and aggregate stats."""
+    simulator = BatchSimulator(indicators, concurrency, seed, fast)
+    
+    # Ctrl-C: finish the sessions in flight, then report what ran
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGINT, simulator.shutdown)
+    except (NotImplementedError, RuntimeError):  # Windows event loops
+        signal.signal(signal.SIGINT, lambda *_: loop.call_soon_threadsafe(simulator.shutdown))
+    
+    stats = {
+        "total": 0,
+        "clicked": 0,
+        "carted": 0,
+        "failed": 0
     }
+    # Per-session timings, filled in completion order
+    session_ns = np.empty(num_sessions, dtype=np.int64)
+    track_ms = np.empty(num_sessions)
+    succeeded = 0
+    
+    start = time.perf_counter()
+    async for outcome in simulator.stream(num_sessions):
+        stats["total"] += 1
+        if outcome.error is not None:
+            stats["failed"] += 1
+            print(f"  ❌ Session {outcome.index} failed: {outcome.error}")
+        else:
+            result = outcome.result
+            session_ns[succeeded] = outcome.elapsed_ns
+            track_ms[succeeded] = result["track_ms"]
+            succeeded += 1
+            if result["clicked"]:
+                stats["clicked"] += 1
+            if result["carted"]:
+                stats["carted"] += 1
+        
+        # Progress indicator
+        if stats["total"] % 10 == 0:
+            print(f"  Progress: {stats['total']}/{num_sessions} sessions")
+    
+    elapsed = time.perf_counter() - start
+    
+    stats["throughput"] = stats["total"] / elapsed if elapsed > 0 else 0.0
+    if succeeded:
+        stats["session_p50"], stats["session_p95"], stats["session_p99"] = (
+            np.percentile(session_ns[:succeeded], [50, 95, 99]) / 1e6
+        )
+        stats["track_p50"], stats["track_p95"], stats["track_p99"] = (
+            np.percentile(track_ms[:succeeded], [50, 95, 99])
+        )
+    return stats
 
 
 def main():
@@ -167,7 +421,11 @@ def main():
     parser.add_argument("--sessions", type=int, default=50, 
                         help="Number of sessions to simulate")
     parser.add_argument("--fast", action="store_true",
-                        help="Skip sleep delays for faster simulation")
+                        help="Skip simulated think time between events")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="Maximum sessions simulated at once")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for a reproducible simulation")
     args = parser.parse_args()
     
     print("📊 Analytics Simulation")
@@ -175,30 +433,27 @@ def main():
     print(f"Simulating {args.sessions} user sessions...")
     
     indicators = SuccessIndicators()
+    stats = asyncio.run(run_simulation(indicators, args.sessions, args.concurrency,
+                                       args.seed, args.fast))
     
-    stats = {
-        "total": 0,
-        "clicked": 0,
-        "carted": 0
-    }
-    
-    for i in range(args.sessions):
-        result = simulate_user_session(indicators, i)
-        stats["total"] += 1
-        if result["clicked"]:
-            stats["clicked"] += 1
-        if result["carted"]:
-            stats["carted"] += 1
-        
-        # Progress indicator
-        if (i + 1) % 10 == 0:
-            print(f"  Progress: {i + 1}/{args.sessions} sessions")
+    if stats["total"] == 0:
+        print("\n⚠️ No sessions were simulated")
+        return
     
     print("\n" + "=" * 50)
     print("✅ Simulation Complete!")
     print(f"  Sessions: {stats['total']}")
     print(f"  Sessions with clicks: {stats['clicked']} ({stats['clicked']/stats['total']*100:.1f}%)")
     print(f"  Sessions with carts: {stats['carted']} ({stats['carted']/stats['total']*100:.1f}%)")
+    if stats["failed"]:
+        print(f"  Failed sessions: {stats['failed']}")
+    print(f"  Throughput: {stats['throughput']:.1f} sessions/s")
+    if "session_p50" in stats:
+        print(f"  Session latency: p50={stats['session_p50']:.2f}ms  "
+              f"p95={stats['session_p95']:.2f}ms  p99={stats['session_p99']:.2f}ms")
+    if "track_p50" in stats:
+        print(f"  Tracking latency: p50={stats['track_p50']:.2f}ms  "
+              f"p95={stats['track_p95']:.2f}ms  p99={stats['track_p99']:.2f}ms")
     
     # Show dashboard
     print("\n" + "=" * 50)
@@ -1,7 +1,24 @@
-import requests
-import json
+import asyncio
+import httpx
+import orjson
+import pytest
+from typing import Optional
 
-def test_search():
+# Keep-alive pool shared by every request the client sends
+LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+TIMEOUT = httpx.Timeout(30, connect=3)
+
+# Bodies are encoded with orjson and sent as raw content
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Skipped under pytest unless the API server is up (see conftest.py)
+pytestmark = pytest.mark.api
+
+async def test_search(client: Optional[httpx.AsyncClient] = None):
+    if client is None:  # Run on its own, e.g. under pytest
+        async with httpx.AsyncClient(limits=LIMITS, timeout=TIMEOUT) as client:
+            return await test_search(client)
+    
     url = "http://localhost:8123/api/search"
     payload = {
         "query": "laptop",
@@ -13,29 +30,32 @@ def test_search():
     
     try:
         print(f"🚀 Sending POST request to {url}...")
-        resp = requests.post(url, json=payload)
-        
-        print(f"📊 Status Code: {resp.status_code}")
-        
-        if resp.status_code == 200:
-            data = resp.json()
-            print(f"✅ Response received!")
-            print(f"   Path: {data.get('path')}")
-            print(f"   Results count: {len(data.get('results', []))}")
-            
-            if data.get('results'):
-                print(f"   Sample result: {data['results'][0]['name']}")
-            else:
-                print("   ⚠️ Results list is empty!")
-                
-            print("\nFull Response:")
-            print(json.dumps(data, indent=2))
-        else:
-            print(f"❌ Error: {resp.text}")
-            
-    except Exception as e:
+        resp = await client.post(url, content=orjson.dumps(payload), headers=JSON_HEADERS)
+    except httpx.TransportError as e:
         print(f"❌ Connection failed: {e}")
         print("Make sure uvicorn is running on port 8123!")
+        raise
+    
+    print(f"📊 Status Code: {resp.status_code}")
+    assert resp.status_code == 200, f"❌ Error: {resp.status_code} - {resp.text}"
+    
+    data = orjson.loads(resp.content)
+    print(f"✅ Response received!")
+    print(f"   Path: {data.get('path')}")
+    print(f"   Results count: {len(data.get('results', []))}")
+    
+    if data.get('results'):
+        print(f"   Sample result: {data['results'][0]['name']}")
+    else:
+        print("   ⚠️ Results list is empty!")
+        
+    print("\nFull Response:")
+    print(orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
+    assert data.get('results'), "Search returned no results"
+
+async def run_all():
+    async with httpx.AsyncClient(limits=LIMITS, timeout=TIMEOUT) as client:
+        await test_search(client)
 
 if __name__ == "__main__":
-    test_search()
+    asyncio.run(run_all())
@@ -6,13 +6,12 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.search_engine import FinBundleEngine
+from scripts._bootstrap import run
 
-async def test_bundle():
+async def test_bundle(engine: FinBundleEngine):
     print("\n🎮 Testing Bundle Optimization")
     print("=" * 60)
     
-    engine = FinBundleEngine()
-    
     # Test queries that should trigger deep path (bundle optimization)
     test_cases = [
         ("gaming setup", 1500),
@@ -20,12 +19,21 @@ async def test_bundle():
         ("streaming kit", 800),
     ]
     
-    for query, budget in test_cases:
+    # The searches are independent: run them together, then report in order
+    outcomes = await asyncio.gather(
+        *(engine.search(query, 'test_user', budget, skip_explanations=True)
+          for query, budget in test_cases),
+        return_exceptions=True
+    )
+    
+    errors = []
+    for (query, budget), result in zip(test_cases, outcomes):
         print(f"\n📝 Query: '{query}' | Budget: ${budget}")
         print("-" * 50)
         
         try:
-            result = await engine.search(query, 'test_user', budget, skip_explanations=True)
+            if isinstance(result, Exception):
+                raise result
             
             path = result.get('path', 'unknown')
             print(f"   Path: {path}")
@@ -55,8 +63,10 @@ async def test_bundle():
             print(f"   ❌ Error: {e}")
             import traceback
             traceback.print_exc()
+            errors.append(f"{query!r}: {e!r}")
     
     print("\n" + "=" * 60)
+    assert not errors, "Bundle searches failed: " + "; ".join(errors)
 
 if __name__ == "__main__":
-    asyncio.run(test_bundle())
+    run(test_bundle(FinBundleEngine()))
@@ -1,10 +1,20 @@
 import os
+import sys
 import asyncio
+import pytest
+from pathlib import Path
 from dotenv import load_dotenv
-from groq import Groq
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.llm_clients import get_groq_client
 
 load_dotenv()
 
+# Skipped under pytest unless GROQ_API_KEY is set (see conftest.py)
+pytestmark = pytest.mark.groq
+
 def test_groq():
     print("🧪 Testing Groq API Connection...")
     
@@ -16,7 +26,7 @@ def test_groq():
     print(f"🔑 Key found: {api_key[:8]}...")
     
     try:
-        client = Groq(api_key=api_key)
+        client = get_groq_client(api_key)
         
         print("\n🚀 Sending test request (llama-3.1-8b-instant)...")
         completion = client.chat.completions.create(
@@ -35,6 +45,7 @@ def test_groq():
         
     except Exception as e:
         print(f"\n❌ Error: {e}")
+        raise
 
 if __name__ == "__main__":
     test_groq()
@@ -1,11 +1,10 @@
 """Test scoring calibration."""
 import sys
 sys.path.insert(0, '.')
-import asyncio
 from core.search_engine import FinBundleEngine
+from scripts._bootstrap import run
 
-async def test():
-    engine = FinBundleEngine()
+async def test_scoring(engine: FinBundleEngine):
     result = await engine.search('4K monitors', 'test_user', 800, skip_explanations=True)
     
     print('SEARCH: 4K monitors')
@@ -22,4 +21,4 @@ async def test():
         print()
 
 if __name__ == '__main__':
-    asyncio.run(test())
+    run(test_scoring(FinBundleEngine()))
@@ -1,12 +1,10 @@
 """Test search with taxonomy disambiguation."""
 import sys
 sys.path.insert(0, '.')
-import asyncio
 from core.search_engine import FinBundleEngine
+from scripts._bootstrap import run
 
-async def test_search():
-    engine = FinBundleEngine()
-    
+async def test_search(engine: FinBundleEngine):
     # Test 'gaming keyboard' - should return computer keyboards, not musical
     result = await engine.search(
         query='gaming keyboard',
@@ -72,4 +70,4 @@ async def test_search():
         print(f"  {i+1}. {name}... ({cat})")
 
 if __name__ == '__main__':
-    asyncio.run(test_search())
+    run(test_search(FinBundleEngine()))
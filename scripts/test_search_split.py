@@ -15,6 +15,7 @@ from core.embeddings import EmbeddingService
 
 async def test_search_split():
     print("🧪 Testing Search Architecture Split")
+    errors = []
     
     # 1. Test Text Search (MiniLM on products_main)
     print("\n[1] Testing Text Search (MiniLM)...")
@@ -30,6 +31,7 @@ async def test_search_split():
         
         if len(vec) != 384:
             print("❌ Error: MiniLM should be 384 dim")
+            errors.append(f"MiniLM embedding has {len(vec)} dims, expected 384")
         else:
             print("✅ MiniLM embedding correct")
 
@@ -44,6 +46,7 @@ async def test_search_split():
             
     except Exception as e:
         print(f"❌ Text Search Failed: {e}")
+        errors.append(f"Text search: {e!r}")
 
     # 2. Test Image Search (CLIP on products_multimodal)
     print("\n[2] Testing Image Search (CLIP)...")
@@ -58,6 +61,9 @@ async def test_search_split():
              
     except Exception as e:
         print(f"❌ Visual Search Failed: {e}")
+        errors.append(f"Visual search: {e!r}")
+    
+    assert not errors, "; ".join(errors)
 
 if __name__ == "__main__":
     asyncio.run(test_search_split())